@@ -0,0 +1,183 @@
+"""
+Incrementally maintained dashboard rollups.
+Stores per-user spending sums and counts so the graphs do not have to regroup the whole history.
+
+pandas is only imported when a rollup is turned into a DataFrame, so the store itself
+stays cheap to import on routes that only log transactions.
+"""
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from cachetools import TTLCache
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+MONTH_ORDER = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+WEEKDAY_ORDER = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
+def _parse_date(value) -> date:
+    """Parse a transaction date coming from Supabase or the transaction form."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class UserAggregates:
+    """
+    Running totals behind the dashboard graphs.
+
+    - Spending sums per category and payment method.
+    - Spending sums and counts per weekday, for the weekday averages.
+    - Spending sums per (ISO day, category), the base of the time series in `timeseries`.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.category_totals: Dict[str, float] = defaultdict(float)
+        self.payment_totals: Dict[str, float] = defaultdict(float)
+        self.weekday_totals: Dict[str, float] = defaultdict(float)
+        self.weekday_counts: Dict[str, int] = defaultdict(int)
+        self.daily_totals: Dict[Tuple[str, str], float] = defaultdict(float)
+
+    @classmethod
+    def from_frame(cls, df: "pd.DataFrame") -> "UserAggregates":
+        """
+        Build the rollups from a frame produced by `extract_data`.
+
+        Args:
+            df: DataFrame of the user's transactions
+
+        Returns:
+            UserAggregates: Rollups over the whole frame
+        """
+        aggregates = cls()
+        if df.empty:
+            return aggregates
+        aggregates.count = len(df)
+        aggregates.category_totals.update(
+            df.groupby('Category', observed=True)['Total'].sum().to_dict())
+        aggregates.payment_totals.update(
+            df.groupby('Payment Method', observed=True)['Total'].sum().to_dict())
+        weekday = df.groupby('Weekday', observed=True)['Total'].agg(['sum', 'count'])
+        aggregates.weekday_totals.update(weekday['sum'].to_dict())
+        aggregates.weekday_counts.update(weekday['count'].to_dict())
+        daily = df.groupby([df['Date'].dt.normalize(), 'Category'], observed=True)['Total'].sum()
+        days = daily.index.get_level_values(0).strftime('%Y-%m-%d')
+        categories = daily.index.get_level_values(1)
+        aggregates.daily_totals.update(zip(zip(days, categories), daily.tolist()))
+        return aggregates
+
+    def copy(self) -> "UserAggregates":
+        """A copy whose counters can be updated without touching this one."""
+        aggregates = UserAggregates()
+        aggregates.count = self.count
+        aggregates.category_totals.update(self.category_totals)
+        aggregates.payment_totals.update(self.payment_totals)
+        aggregates.weekday_totals.update(self.weekday_totals)
+        aggregates.weekday_counts.update(self.weekday_counts)
+        aggregates.daily_totals.update(self.daily_totals)
+        return aggregates
+
+    def add(self, transaction: Dict[str, Any]) -> None:
+        """
+        Fold a single new transaction into the rollups in O(1).
+
+        Args:
+            transaction: Transaction record as stored in Supabase
+        """
+        total = round(float(transaction.get('transactionTotal')), 2)
+        day = _parse_date(transaction.get('transactionDate'))
+        weekday = WEEKDAY_ORDER[day.isoweekday() % 7]
+
+        self.count += 1
+        self.category_totals[transaction.get('transactionCategory')] += total
+        self.payment_totals[transaction.get('transactionPayment')] += total
+        self.weekday_totals[weekday] += total
+        self.weekday_counts[weekday] += 1
+        self.daily_totals[(day.isoformat(), transaction.get('transactionCategory'))] += total
+
+    def category_spending(self) -> "pd.DataFrame":
+        """Total spending per category."""
+        import pandas as pd
+
+        keys = sorted(self.category_totals)
+        return pd.DataFrame({'Category': keys,
+                             'Total': [self.category_totals[k] for k in keys]})
+
+    def payment_spending(self) -> "pd.DataFrame":
+        """Total spending per payment method."""
+        import pandas as pd
+
+        keys = sorted(self.payment_totals)
+        return pd.DataFrame({'Payment Method': keys,
+                             'Total': [self.payment_totals[k] for k in keys]})
+
+    def weekday_spending(self) -> "pd.DataFrame":
+        """Average spending per weekday, in calendar order."""
+        import pandas as pd
+
+        averages = [self.weekday_totals[d] / self.weekday_counts[d]
+                    if self.weekday_counts.get(d) else None
+                    for d in WEEKDAY_ORDER]
+        return pd.DataFrame({'Weekday': WEEKDAY_ORDER, 'Total': averages})
+
+
+class AggregateStore:
+    """
+    Per-user cache of `UserAggregates`, tagged with the data version they were built from.
+
+    Cached rollups are never changed once stored, an insert stores an updated copy
+    under the new version, so graphs and snapshots built from version N only ever
+    see version N's data.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 900):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version: int) -> Optional[UserAggregates]:
+        """Return the user's rollups if they match the given data version."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1]
+
+    def put(self, user_id, version: int, aggregates: UserAggregates) -> None:
+        """Store freshly built rollups for a data version."""
+        with self._lock:
+            self._entries[user_id] = (version, aggregates)
+
+    def apply(self, user_id, version: int, transaction: Dict[str, Any]) -> None:
+        """
+        Fold an inserted transaction into the cached rollups.
+
+        The rollups are only updated when they are exactly one version behind,
+        otherwise they are dropped and rebuilt on the next read.
+
+        Args:
+            user_id: Id of the user
+            version: Data version after the insert
+            transaction: The inserted transaction
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            if entry[0] != version - 1:
+                self._entries.pop(user_id, None)
+                return
+            aggregates = entry[1].copy()
+            aggregates.add(transaction)
+            self._entries[user_id] = (version, aggregates)
+
+    def invalidate(self, user_id) -> None:
+        """Drop a user's rollups."""
+        with self._lock:
+            self._entries.pop(user_id, None)
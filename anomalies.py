@@ -0,0 +1,233 @@
+"""
+Unusual-transaction and recurring-charge detection.
+Both run on the `extract_data` frame with whole-column NumPy/pandas operations, so a
+million-row history is analysed in a fraction of a second.
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from aggregates import WEEKDAY_ORDER
+from metrics import timed
+
+# Iglewicz and Hoaglin: |modified z| above 3.5 is a likely outlier
+Z_THRESHOLD = 3.5
+# Scales the MAD to the standard deviation of a normal distribution
+MAD_SCALE = 0.6745
+# Smaller category/weekday groups have no meaningful "usual" amount
+MIN_GROUP_SIZE = 5
+
+MIN_OCCURRENCES = 4
+# Shorter median gaps are repeat purchases, not charges
+MIN_PERIOD_DAYS = 6
+# A gap is regular within this many days of the median gap, enough for 28-31 day months
+GAP_TOLERANCE_DAYS = 3
+# Share of gaps that must be regular
+MIN_REGULAR_SHARE = 0.75
+CADENCES = ((7, "weekly"), (14, "biweekly"), (30, "monthly"), (91, "quarterly"), (365, "yearly"))
+
+MAX_ANOMALIES = 20
+MAX_RECURRING = 20
+
+
+def _group_scores(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Median total of each row's (category, weekday) group and the row's modified z-score."""
+    total = df['Total'].to_numpy('float64')
+    groups = df['Category'].cat.codes.to_numpy('int64') * len(WEEKDAY_ORDER) \
+        + df['Weekday'].cat.codes.to_numpy('int64')
+    by_group = pd.Series(total).groupby(groups)
+
+    median = by_group.transform('median').to_numpy()
+    deviation = np.abs(total - median)
+    mad = pd.Series(deviation).groupby(groups).transform('median').to_numpy()
+    size = np.bincount(groups)[groups]
+
+    valid = (mad > 0) & (size >= MIN_GROUP_SIZE)
+    scores = np.zeros(len(total))
+    np.divide(MAD_SCALE * (total - median), mad, out=scores, where=valid)
+    return median, scores
+
+
+def robust_zscores(df: pd.DataFrame) -> pd.Series:
+    """
+    Modified z-score of each transaction's total within its (category, weekday) group.
+
+    Uses the group median and median absolute deviation, so a few large
+    purchases do not hide each other the way they would with mean and standard
+    deviation. Groups smaller than MIN_GROUP_SIZE, or whose amounts never vary,
+    score 0.
+    """
+    return pd.Series(_group_scores(df)[1], index=df.index, name='Z')
+
+
+def find_anomalies(df: pd.DataFrame, threshold: float = Z_THRESHOLD) -> pd.DataFrame:
+    """
+    Transactions whose total is unusual for their category and weekday.
+
+    Returns:
+        pd.DataFrame: Date, Category, Weekday, Total, the group's Typical
+                      (median) total and Z, most unusual first.
+    """
+    median, scores = _group_scores(df)
+    flagged = np.flatnonzero(np.abs(scores) > threshold)
+    rows = df.iloc[flagged]
+    anomalies = pd.DataFrame({
+        'Date': rows['Date'].to_numpy(),
+        'Category': rows['Category'].astype(str).to_numpy(),
+        'Weekday': rows['Weekday'].astype(str).to_numpy(),
+        'Total': rows['Total'].to_numpy(),
+        'Typical': median[flagged],
+        'Z': scores[flagged],
+    })
+    return anomalies.iloc[np.argsort(-np.abs(anomalies['Z'].to_numpy()), kind='stable')] \
+        .reset_index(drop=True)
+
+
+def cadence(period: float) -> str:
+    """Name of the closest common billing cycle to a period in days."""
+    days, name = min(CADENCES, key=lambda c: abs(c[0] - period))
+    return name if abs(days - period) <= max(GAP_TOLERANCE_DAYS, days * 0.05) else f"every {period:.0f} days"
+
+
+def _sort_order(*keys: np.ndarray) -> np.ndarray:
+    """
+    Order of rows sorted by several non-negative-range integer keys, first key first.
+
+    Packs the keys into one int64 when their ranges fit, a single-key argsort is
+    several times faster than `np.lexsort`.
+    """
+    packed = np.zeros(len(keys[0]), dtype='int64')
+    capacity = 1
+    for key in keys:
+        low, span = key.min(), int(key.max() - key.min()) + 1
+        capacity *= span
+        if capacity >= 2 ** 63:
+            return np.lexsort(keys[::-1])
+        packed = packed * span + (key - low)
+    return np.argsort(packed)
+
+
+def find_recurring(df: pd.DataFrame, min_occurrences: int = MIN_OCCURRENCES) -> pd.DataFrame:
+    """
+    Charges of the same category and amount that repeat at a regular interval.
+
+    Transactions are sorted by (category, amount, date) once; the gaps between
+    consecutive rows of the same series are then measured against the series'
+    median gap.
+
+    Returns:
+        pd.DataFrame: Category, Amount, Occurrences, Period (median gap in days),
+                      Cadence, First, Last, Next (expected), Active (the next
+                      charge is not overdue by more than half a period) and
+                      Annual cost, costliest first.
+    """
+    columns = ['Category', 'Amount', 'Occurrences', 'Period', 'Cadence', 'First', 'Last', 'Next',
+               'Active', 'Annual']
+    if len(df) < min_occurrences:
+        return pd.DataFrame(columns=columns)
+
+    days = df['Date'].to_numpy().astype('datetime64[D]').astype('int64')
+    cents = np.rint(df['Total'].to_numpy('float64') * 100).astype('int64')
+    codes = df['Category'].cat.codes.to_numpy('int64')
+    order = _sort_order(codes, cents, days)
+    days, cents, codes = days[order], cents[order], codes[order]
+
+    # Consecutive rows of one (category, amount) series
+    same = (codes[1:] == codes[:-1]) & (cents[1:] == cents[:-1])
+    series = np.concatenate(([0], np.cumsum(~same)))
+    counts = np.bincount(series)
+
+    gap_series = series[1:][same]
+    keep = counts[gap_series] >= min_occurrences
+    gap_series = gap_series[keep]
+    gaps = (days[1:] - days[:-1])[same][keep]
+    if not len(gaps):
+        return pd.DataFrame(columns=columns)
+
+    period = pd.Series(gaps).groupby(gap_series, sort=False).median()
+    median_gap = np.zeros(len(counts))
+    median_gap[period.index.to_numpy()] = period.to_numpy()
+    regular = np.abs(gaps - median_gap[gap_series]) <= GAP_TOLERANCE_DAYS
+    gap_counts = np.bincount(gap_series, minlength=len(counts))
+    share = np.bincount(gap_series, weights=regular, minlength=len(counts)) / np.maximum(gap_counts, 1)
+    recurring = np.flatnonzero((gap_counts > 0) & (share >= MIN_REGULAR_SHARE)
+                               & (median_gap >= MIN_PERIOD_DAYS))
+    if not len(recurring):
+        return pd.DataFrame(columns=columns)
+
+    starts = np.flatnonzero(np.concatenate(([True], ~same)))
+    first, last = starts[recurring], starts[recurring] + counts[recurring] - 1
+    periods = median_gap[recurring]
+    amounts = cents[first] / 100
+    next_day = days[last] + np.rint(periods).astype('int64')
+    latest = days.max()
+    result = pd.DataFrame({
+        'Category': df['Category'].cat.categories[codes[first]].astype(str),
+        'Amount': amounts,
+        'Occurrences': counts[recurring],
+        'Period': periods,
+        'Cadence': [cadence(p) for p in periods],
+        'First': days[first].astype('datetime64[D]'),
+        'Last': days[last].astype('datetime64[D]'),
+        'Next': next_day.astype('datetime64[D]'),
+        'Active': latest - days[last] <= periods * 1.5,
+        'Annual': amounts * 365 / periods,
+    })
+    return result.sort_values('Annual', ascending=False, kind='stable', ignore_index=True)
+
+
+class Insights:
+    """Unusual transactions and recurring charges found in one user's history."""
+
+    def __init__(self, anomalies: pd.DataFrame, anomaly_count: int, recurring: pd.DataFrame):
+        # The most unusual transactions only, `anomaly_count` is how many were flagged
+        self.anomalies = anomalies
+        self.anomaly_count = anomaly_count
+        self.recurring = recurring
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON form for the API, with ISO dates and amounts rounded to cents."""
+        anomalies = self.anomalies.assign(Date=self.anomalies['Date'].dt.strftime('%Y-%m-%d'))
+        recurring = self.recurring.copy()
+        for column in ('First', 'Last', 'Next'):
+            recurring[column] = pd.to_datetime(recurring[column]).dt.strftime('%Y-%m-%d')
+        return {
+            "anomaly_count": self.anomaly_count,
+            "anomalies": anomalies.round({'Total': 2, 'Typical': 2, 'Z': 1}).to_dict('records'),
+            "recurring": recurring.round({'Amount': 2, 'Period': 1, 'Annual': 2}).to_dict('records'),
+        }
+
+    def context(self) -> Dict[str, List[str]]:
+        """Prompt sections for the LLM, named like the summary's sections."""
+        sections = {}
+        if len(self.anomalies):
+            sections[f"Unusual transactions ({self.anomaly_count} flagged, most unusual shown)"] = [
+                f"{row.Date:%Y-%m-%d}, {row.Category}, {row.Total:.2f} on a {row.Weekday} "
+                f"(typical {row.Typical:.2f}, robust z {row.Z:.1f})"
+                for row in self.anomalies.itertuples(index=False)]
+        if len(self.recurring):
+            sections["Recurring charges"] = [
+                f"{row.Category}, {row.Amount:.2f} {row.Cadence}, {row.Occurrences} times from "
+                f"{row.First:%Y-%m-%d} to {row.Last:%Y-%m-%d}, "
+                f"{'active' if row.Active else 'lapsed'}, about {row.Annual:.2f} a year"
+                for row in self.recurring.itertuples(index=False)]
+        return sections
+
+
+@timed("insights")
+def detect(df: pd.DataFrame, max_anomalies: int = MAX_ANOMALIES,
+           max_recurring: int = MAX_RECURRING) -> Insights:
+    """
+    Runs both detectors on an `extract_data` frame.
+
+    Args:
+        df: The user's transactions
+        max_anomalies: How many of the most unusual transactions to keep
+        max_recurring: How many of the costliest recurring charges to keep
+
+    Returns:
+        Insights: The findings, small enough to cache and put in a prompt
+    """
+    anomalies = find_anomalies(df)
+    return Insights(anomalies.head(max_anomalies), len(anomalies), find_recurring(df).head(max_recurring))
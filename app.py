@@ -1,37 +1,186 @@
+"""
+SmartSpending web app.
+
+The routes live on the `main` blueprint and `create_app` builds the Flask app around it.
+The analytics stack (pandas, plotly) and the LLM stack (langchain) are imported on first
+use and the storage client is created on first request, so booting a worker and serving
+pages like /login or /about never pays for them.
+"""
 import os
 from dotenv import load_dotenv
-from flask import Flask, flash, redirect, render_template, session, url_for
-import markdown
-from supabase import create_client, Client
-from smartAI import create_llm, invoke_llm
-from forms import LoginForm, RegisterForm, TransactionForm
-from graphing import generate_graphs
-from extract_data import extract_data
+from flask import (Blueprint, Flask, Response, abort, flash, jsonify, redirect, render_template, request,
+                   session, stream_with_context, url_for)
+from cachetools import TTLCache
+from flask_wtf import FlaskForm
+from forms import BudgetForm, ImportForm, LoginForm, RegisterForm, TransactionForm
+from importer import ImportResult, import_transactions
+from exporter import PARQUET_AVAILABLE, stream_csv, stream_parquet
+from storage import create_storage
+from storage.instrumented import InstrumentedStorage
+from transaction_cache import TransactionCache
+from jobs import DONE, ERROR, JobQueue
+from aggregates import AggregateStore, UserAggregates
+from snapshots import Snapshot, SnapshotStore
+from budgets import OK, BudgetTracker, budget_context, month_category_totals, month_key
+import assets
+import compression
+import metrics
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+from importlib.metadata import PackageNotFoundError, version as package_version
+import asyncio
+import base64
+from datetime import date, timedelta
 import hashlib
+import inspect
+import json
+import logging
+import threading
+import uuid
 
 # Load environment variables first
 load_dotenv()
 
-app = Flask(__name__)
-app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
-app.secret_key = os.getenv("SECRET_KEY")
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("main", __name__)
+
+# Storage client, created on first use by get_storage()
+storage = None
+storage_lock = threading.Lock()
+
+# Size and lifetime of the per-user caches below
+CACHE_SIZE = int(os.getenv("TRANSACTION_CACHE_SIZE", 1024))
+CACHE_TTL = int(os.getenv("TRANSACTION_CACHE_TTL", 900))
+
+# Server-side cache of each user's transactions, the session only keeps the version
+transaction_cache = TransactionCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+
+# Dashboard rollups, a logged transaction is folded into a copy stored under the new version
+aggregate_store = AggregateStore(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+
+# Rendered figure JSON keyed by (userId, data version)
+graph_cache = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+graph_cache_lock = threading.Lock()
+
+# `extract_data` frames keyed by (userId, data version, row count), few are kept as they are large
+frame_cache = TTLCache(maxsize=int(os.getenv("FRAME_CACHE_SIZE", 8)), ttl=CACHE_TTL)
+frame_cache_lock = threading.Lock()
+
+# Unusual transactions and recurring charges keyed by (userId, data version)
+insight_cache = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+insight_cache_lock = threading.Lock()
+
+# Rendered dashboards keyed by (userId, data version), built in the background after each write
+snapshot_store = SnapshotStore(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+snapshot_jobs = JobQueue(max_workers=int(os.getenv("SNAPSHOT_WORKERS", 2)), ttl=CACHE_TTL,
+                         name="snapshots")
+
+# Budgets and running per-(month, category) spend, updated as transactions are logged
+budget_tracker = BudgetTracker(maxsize=CACHE_SIZE, ttl=CACHE_TTL)
+# Users whose last budget lookup failed, the dashboard skips budgets for them until this expires
+budget_failures = TTLCache(maxsize=CACHE_SIZE, ttl=int(os.getenv("BUDGET_RETRY_SECONDS", 60)))
+budget_failures_lock = threading.Lock()
+# Send budget progress to the LLM along with the transaction summary
+LLM_BUDGET_CONTEXT = os.getenv("LLM_BUDGET_CONTEXT", "true").lower() in ("1", "true", "yes", "on")
+
+# Dashboard figures are built side by side on this pool
+figure_pool = ThreadPoolExecutor(max_workers=int(os.getenv("FIGURE_WORKERS", 4)),
+                                 thread_name_prefix="figures")
+
+# Columns shown in the transaction table
+TABLE_COLUMNS = ("transactionId", "transactionDate", "transactionItems", "transactionSubtotal",
+                 "transactionTaxes", "transactionTotal", "transactionCategory", "transactionPayment")
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
-# Supabase setup
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Optional limit on how much history the dashboard loads, in days (unset = everything)
+DASHBOARD_HISTORY_DAYS = os.getenv("DASHBOARD_HISTORY_DAYS")
+
+# Data versions restart with the process, so ETags also carry a per-process id
+etag_salt = uuid.uuid4().hex
+
+# Progress of the running or last bulk import per user
+import_progress = TTLCache(maxsize=1024, ttl=3600)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+
+# README.md rendered to HTML, with the mtime it was rendered from
+README_PATH = "README.md"
+readme_cache = None
 
 # Global LLM instance for reuse
 llm = None
-ten_points = None
+llm_lock = threading.Lock()
+
+# Smart spending recommendations run off the request path, cached per (userId, transaction set)
+llm_jobs = JobQueue(
+    max_workers=int(os.getenv("LLM_WORKERS", 4)),
+    ttl=int(os.getenv("LLM_RESULT_TTL", 3600)),
+    name="llm",
+)
+
+def create_app(config=None):
+    """
+    Builds the Flask app.
+
+    Args:
+        config (dict, optional): Extra configuration applied after the defaults.
+
+    Returns:
+        Flask: The app with the `main` blueprint registered.
+    """
+    flask_app = Flask(__name__)
+    flask_app.secret_key = os.getenv("SECRET_KEY")
+    if config:
+        flask_app.config.update(config)
+    metrics.init_app(flask_app)
+    # Registered after metrics so compression time is part of the request timing
+    compression.init_app(flask_app)
+    assets.init_app(flask_app)
+    flask_app.register_blueprint(bp)
+    return flask_app
+
+def get_storage():
+    """Returns the shared storage backend, creating its client on first use."""
+    global storage
+    if storage is None:
+        with storage_lock:
+            if storage is None:
+                # Supabase unless STORAGE_BACKEND says otherwise, timed for /metrics
+                storage = InstrumentedStorage(create_storage())
+    return storage
+
+@bp.before_request
+def sync_cached_data():
+    """
+    Drops this worker's cached copy of the user's data if another worker wrote since.
+
+    Caches are per process, so each write puts a marker in the session (see
+    `mark_written`) and a worker that has not seen the marker reloads.
+    """
+    user_id = session.get("userId")
+    if user_id is not None and transaction_cache.sync(user_id, session.get("data_written")):
+        aggregate_store.invalidate(user_id)
+        budget_tracker.invalidate(user_id)
+
+def mark_written(user_id):
+    """Records in the session that the user's data changed, for the other workers."""
+    session["data_written"] = transaction_cache.mark(user_id)
 
 # Authentication decorator
 def login_required(f):
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_coroutine(*args, **kwargs):
+            if "username" not in session:
+                return redirect(url_for("main.login"))
+            return await f(*args, **kwargs)
+        return decorated_coroutine
+
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if "username" not in session:
-            return redirect(url_for("login"))
+            return redirect(url_for("main.login"))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -40,77 +189,545 @@ def hash_password(password):
     """Hash a password for security"""
     return hashlib.sha256(password.encode()).hexdigest()
 
-@app.before_request
-def before_request():
-    """Initialize global LLM instance when needed"""
+def load_transactions(user_id):
+    """
+    Returns (data version, transactions, total count) from the server-side cache.
+
+    Loads the dashboard columns from storage only on a cache miss, in one
+    round trip that also returns the count. With DASHBOARD_HISTORY_DAYS set,
+    only that window is loaded and the full count takes a second query.
+    """
+    cached = transaction_cache.get(user_id)
+    while cached is None:
+        expected = transaction_cache.version(user_id)
+        if DASHBOARD_HISTORY_DAYS:
+            start = (date.today() - timedelta(days=int(DASHBOARD_HISTORY_DAYS))).isoformat()
+            transactions, _ = get_storage().fetch_transactions(user_id, columns=TABLE_COLUMNS, start=start)
+            count = get_storage().count_transactions(user_id)
+        else:
+            transactions, count = get_storage().fetch_transactions(user_id, columns=TABLE_COLUMNS)
+        transactions = tuple(transactions)
+        # Reload if a write landed while fetching, the rows might not include it
+        version = transaction_cache.set(user_id, transactions, count, expected=expected)
+        if version is not None:
+            return version, transactions, count
+        cached = transaction_cache.get(user_id)
+    return cached
+
+def get_transactions(user_id):
+    """
+    Returns the user's transactions from the server-side cache and records
+    the current data version in the session.
+    """
+    version, transactions, _ = load_transactions(user_id)
+    session["data_version"] = version
+    return transactions
+
+def load_history(user_id):
+    """
+    Returns (data version, transactions) covering the user's full history.
+
+    The cached transactions unless DASHBOARD_HISTORY_DAYS limits the cache to a
+    window, then the full history is read from storage.
+    """
+    if not DASHBOARD_HISTORY_DAYS:
+        return load_transactions(user_id)[:2]
+    while True:
+        version = load_transactions(user_id)[0]
+        transactions, _ = get_storage().fetch_transactions(user_id, columns=TABLE_COLUMNS)
+        # Retry if a write landed while fetching, so the rows match the version
+        if transaction_cache.version(user_id) == version:
+            return version, tuple(transactions)
+
+def load_frame(user_id, version, transactions):
+    """
+    Returns the `extract_data` frame of the user's transactions at `version`, built once.
+
+    The rollups, insights and LLM summary of one version all share it. The row
+    count is part of the key because the dashboard window and the full history
+    share a version; at one version, a window as long as the history is the history.
+    """
+    key = (user_id, version, len(transactions))
+    with frame_cache_lock:
+        df = frame_cache.get(key)
+    if df is None:
+        from extract_data import extract_data
+
+        df = extract_data(transactions)
+        with frame_cache_lock:
+            frame_cache[key] = df
+    return df
+
+def load_aggregates(user_id, version, transactions):
+    """
+    Returns the user's dashboard rollups at `version`, rebuilding them only on a cold cache.
+    """
+    aggregates = aggregate_store.get(user_id, version)
+    if aggregates is None:
+        aggregates = UserAggregates.from_frame(load_frame(user_id, version, transactions))
+        aggregate_store.put(user_id, version, aggregates)
+    return aggregates
+
+def get_aggregates(user_id):
+    """
+    Returns the user's dashboard rollups, rebuilding them only on a cold cache.
+    """
+    transactions = get_transactions(user_id)
+    return load_aggregates(user_id, session["data_version"], transactions)
+
+def load_insights(user_id, version, transactions):
+    """
+    Returns the unusual transactions and recurring charges in the user's history at `version`,
+    detecting them only once per version.
+    """
+    with insight_cache_lock:
+        insights = insight_cache.get((user_id, version))
+    if insights is None:
+        from anomalies import detect
+
+        insights = detect(load_frame(user_id, version, transactions))
+        with insight_cache_lock:
+            insight_cache[(user_id, version)] = insights
+    return insights
+
+def graphs_payload(graphs):
+    """Builds the /api/graphs response body from the figures' JSON documents."""
+    return '{"graphs": [' + ", ".join(graphs or []) + ']}'
+
+def table_page(rows, limit):
+    """Shapes a page of transactions like an /api/transactions response."""
+    return {"transactions": rows, "next_cursor": encode_cursor(rows[-1]) if len(rows) == limit else None}
+
+def build_snapshot(user_id):
+    """
+    Renders a user's dashboard at their current data version and stores it as a snapshot.
+
+    Runs on the snapshot pool, so it must not touch the session.
+
+    The version is read before anything else and the build is dropped if it
+    changed meanwhile: the first page could predate the write, and the write
+    queued its own build.
+    """
+    from graphing import generate_graphs
+
+    version, transactions, count = load_transactions(user_id)
+    if snapshot_store.get(user_id, version) is not None:
+        return
+    first_page = get_storage().page_transactions(user_id, PAGE_SIZE, columns=TABLE_COLUMNS)
+    with graph_cache_lock:
+        payload = graph_cache.get((user_id, version))
+    if payload is None:
+        payload = graphs_payload(generate_graphs(load_aggregates(user_id, version, transactions)))
+    if transaction_cache.version(user_id) != version:
+        return
+    snapshot_store.put(user_id, Snapshot(version, count, table_page(first_page, PAGE_SIZE),
+                                         payload))
+
+def schedule_snapshot(user_id, version):
+    """
+    Queues a snapshot build after the user's data reached `version`, once per version.
+
+    The build renders whatever version is current when it runs, which is `version`
+    unless the cache was reloaded or written to since.
+    """
+    snapshot_jobs.submit(user_id, str(version), build_snapshot, user_id)
+
+def current_snapshot(user_id):
+    """
+    Returns the user's snapshot if it matches their cached data version, else None.
+    """
+    cached = transaction_cache.get(user_id)
+    if cached is None:
+        return None
+    snapshot = snapshot_store.get(user_id, cached[0])
+    if snapshot is not None:
+        session["data_version"] = snapshot.version
+    return snapshot
+
+def recompute_budgets(user_id):
+    """
+    Rebuilds a user's budgets and monthly spend from storage and their rollups.
+
+    Runs on the first budget look-up, after budgets are edited, and on demand to
+    repair running counters that drifted from the stored history.
+    """
+    budgets = get_storage().list_budgets(user_id)
+    spend = {}
+    # Without budgets there is nothing to compare spend to, skip building the rollups
+    if budgets:
+        if DASHBOARD_HISTORY_DAYS:
+            # The cached rollups only cover the dashboard window
+            aggregates = UserAggregates.from_frame(load_frame(user_id, *load_history(user_id)))
+        else:
+            version, transactions, _ = load_transactions(user_id)
+            aggregates = load_aggregates(user_id, version, transactions)
+        spend = month_category_totals(aggregates)
+    budget_tracker.load(user_id, budgets, spend)
+    with budget_failures_lock:
+        budget_failures.pop(user_id, None)
+
+def budget_status(user_id, month=None):
+    """Returns the user's budgets for `month` (default: the current month) with their spending."""
+    if not budget_tracker.loaded(user_id):
+        recompute_budgets(user_id)
+    return budget_tracker.status(user_id, month or month_key(date.today()))
+
+def optional_budget_status(user_id):
+    """
+    `budget_status` for pages where budgets are an extra, like the dashboard and the LLM prompt.
+
+    A failing lookup, e.g. on a Supabase project without the budgets table, is
+    logged and these pages skip budgets for BUDGET_RETRY_SECONDS. The failure is
+    kept apart from `budget_tracker`, so /budgets retries the lookup and shows
+    the error instead of an empty list.
+    """
+    with budget_failures_lock:
+        if user_id in budget_failures:
+            return []
+    try:
+        return budget_status(user_id)
+    except Exception:
+        logger.exception("Budget lookup failed for user %s, is the budgets table created?", user_id)
+        with budget_failures_lock:
+            budget_failures[user_id] = True
+        return []
+
+def budget_alerts(user_id):
+    """Returns this month's budgets that are past their threshold or exceeded."""
+    return [status for status in optional_budget_status(user_id) if status.level != OK]
+
+def llm_context(user_id):
+    """Returns the extra prompt sections for a user's recommendations."""
+    if not LLM_BUDGET_CONTEXT:
+        return None
+    statuses = optional_budget_status(user_id)
+    return {"Budgets": budget_context(statuses)} if statuses else None
+
+def data_etag(user_id, version):
+    """Builds an ETag for a user's data at a given version."""
+    return hashlib.sha1(f"{etag_salt}:{user_id}:{version}".encode()).hexdigest()
+
+def not_modified(etag, last_modified=None):
+    """
+    Checks the request's validators against the current ETag / Last-Modified.
+
+    If-None-Match takes precedence over If-Modified-Since, and uses weak
+    comparison since compressed responses carry weak ETags.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and int(last_modified) <= since.timestamp()
+
+def conditional(response, etag, last_modified=None):
+    """Sets the validators and the revalidate-every-time cache policy on a private response."""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+def readme_html():
+    """Returns README.md rendered to HTML and its mtime, re-rendered only when the file changes."""
+    global readme_cache
+    try:
+        mtime = os.stat(README_PATH).st_mtime
+    except FileNotFoundError:
+        return None, None
+    cached = readme_cache
+    if cached is None or cached[0] != mtime:
+        import markdown
+
+        with open(README_PATH, "r") as f:
+            cached = readme_cache = (mtime, markdown.markdown(f.read()))
+    return cached[1], mtime
+
+def parse_date_arg(name):
+    """Reads an optional ISO date query argument, aborting with 400 if it is malformed."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        abort(400)
+
+def encode_cursor(transaction):
+    """Encodes the (transactionDate, transactionId) keyset cursor of a row."""
+    key = json.dumps([transaction["transactionDate"], transaction["transactionId"]])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def decode_cursor(cursor):
+    """
+    Decodes a keyset cursor, returns None if it is malformed.
+
+    The date ends up in a PostgREST filter string, so only a plain ISO date is accepted.
+    """
+    try:
+        cursor_date, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(cursor_date).isoformat(), int(transaction_id)
+    except (ValueError, TypeError):
+        return None
+
+def transactions_digest(transactions):
+    """Hashes a transaction set so identical histories share one LLM result."""
+    ordered = sorted(transactions, key=lambda t: str(t.get("transactionId")))
+    encoded = json.dumps(ordered, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+def get_llm():
+    """Returns the shared LLM instance, creating it on first use."""
     global llm
-    global supabase
-    global ten_points
+    with llm_lock:
+        if llm is None:
+            from smartAI import create_llm
+
+            llm = create_llm()
+        return llm
+
+def generate_recommendations(job, transactions, version, context=None):
+    """
+    Runs the LLM on a worker thread, publishing each point as soon as it is complete.
+
+    The prompt gets the user's unusual transactions and recurring charges as
+    extra sections, after any `context` passed in.
+    """
+    from smartAI import stream_llm
+
+    context = {**(context or {}), **load_insights(job.owner, version, transactions).context()}
+    df = load_frame(job.owner, version, transactions)
+    ten_points = {}
+    for key, value in stream_llm(data=transactions, llm=get_llm(), context=context, df=df):
+        ten_points[key] = value
+        job.publish({"key": key, "value": value})
+    return ten_points
+
+def plotly_version():
+    """Returns the installed plotly version without importing plotly."""
+    try:
+        return package_version("plotly")
+    except PackageNotFoundError:
+        return "unknown"
 
-@app.route("/")
-@app.route("/home")
+@bp.route("/")
+@bp.route("/home")
 @login_required
-def home():
+async def home():
     """
     Renders the home page for logged-in users.
     
-    - Fetches and displays the user's transaction history.
-    - Generates and embeds graphs based on transaction data.
+    - Shows the user's transaction count.
+    - Embeds the first page of the transaction table, further pages are loaded
+      from `/api/transactions`.
+    - Loads the graphs client-side from the `/api/graphs` endpoint.
+    - Shows alerts for this month's budgets that are past their threshold.
+    - Serves all of the above from the user's dashboard snapshot when it is
+      current, otherwise renders on demand and queues a snapshot build.
     - Redirects to the login page if the user is not authenticated.
     
     Returns:
         Rendered template for the home page if authenticated, otherwise a redirect to login.
     """
-    response = supabase.table("transactions").select(
-        "*", count="exact").eq("userId", session["userId"]).execute()
-    total_transactions = response.count
+    user_id = session["userId"]
+    # Flashed messages are part of the page, so only a clean page can be revalidated
+    revalidate = "_flashes" not in session
+    alerts = await asyncio.to_thread(budget_alerts, user_id)
+    budgets_key = f"{month_key(date.today())}:{budget_tracker.revision(user_id)}"
 
-    # Get transactions if not in session
-    if "all_transactions" not in session:
-        response = supabase.table("transactions").select(
-            "*").eq("userId", session["userId"]).execute()
-        session['all_transactions'] = response.data
-    
-    # Process data for display
-    df = extract_data(session['all_transactions'])
-    graph_html = generate_graphs(session['all_transactions'])
+    snapshot = current_snapshot(user_id)
+    if snapshot is not None:
+        etag = data_etag(user_id, f"home:{snapshot.version}:{budgets_key}")
+        last_modified = transaction_cache.modified(user_id)
+        if revalidate and not_modified(etag, last_modified):
+            return conditional(Response(status=304), etag, last_modified)
+        total_transactions, first_page = snapshot.total_transactions, snapshot.first_page
+    else:
+        # The cached history (for the count) and the first table page are independent, fetch them side by side
+        (version, _, total_transactions), rows = await asyncio.gather(
+            asyncio.to_thread(load_transactions, user_id),
+            asyncio.to_thread(get_storage().page_transactions, user_id, PAGE_SIZE, columns=TABLE_COLUMNS),
+        )
+        session["data_version"] = version
+        first_page = table_page(rows, PAGE_SIZE)
+        schedule_snapshot(user_id, session["data_version"])
+        etag = data_etag(user_id, f"home:{session['data_version']}:{budgets_key}")
+        last_modified = transaction_cache.modified(user_id)
+        if revalidate and not_modified(etag, last_modified):
+            return conditional(Response(status=304), etag, last_modified)
 
-    return render_template(
+    response = Response(render_template(
         "home.html",
         username=session["username"],
         total_transactions=total_transactions,
-        df=df,
-        graphs=graph_html,
-    )
+        first_page=first_page,
+        page_size=PAGE_SIZE,
+        alerts=alerts,
+        parquet_export=PARQUET_AVAILABLE,
+        plotly_version=plotly_version(),
+    ), mimetype="text/html")
+    return conditional(response, etag, last_modified) if revalidate else response
+
+@bp.route("/api/transactions")
+@login_required
+def transactions_api():
+    """
+    Returns one page of the user's transactions, newest first.
+
+    - Uses keyset pagination on (transactionDate, transactionId).
+    - The limit, cursor and optional `start`/`end` dates are pushed down to
+      the storage query.
+    """
+    limit = min(max(request.args.get("limit", PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+
+    after = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = decode_cursor(cursor)
+        if after is None:
+            abort(400)
+
+    rows = get_storage().page_transactions(session["userId"], limit, after=after, columns=TABLE_COLUMNS,
+                                     start=parse_date_arg("start"), end=parse_date_arg("end"))
+    return jsonify(table_page(rows, limit))
+
+@bp.route("/api/graphs")
+@login_required
+async def graphs_api():
+    """
+    Returns the dashboard figures as Plotly JSON.
+
+    - Figures come from the user's dashboard snapshot, or are cached per
+      (userId, data version) when built on demand.
+    - On a miss, the figures are built concurrently on the figure pool.
+    - Responds with an ETag so an unchanged dashboard costs a 304, and the
+      compressed payload is reused per ETag.
+    """
+    user_id = session["userId"]
+    await asyncio.to_thread(get_transactions, user_id)
+    version = session["data_version"]
+
+    etag = data_etag(user_id, version)
+    last_modified = transaction_cache.modified(user_id)
+    if not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        snapshot = snapshot_store.get(user_id, version)
+        if snapshot is not None:
+            payload = snapshot.graphs
+        else:
+            with graph_cache_lock:
+                payload = graph_cache.get((user_id, version))
+        if payload is None:
+            from graphing import generate_graphs
+
+            aggregates = await asyncio.to_thread(get_aggregates, user_id)
+            payload = graphs_payload(await asyncio.to_thread(generate_graphs, aggregates, figure_pool))
+            with graph_cache_lock:
+                graph_cache[(user_id, version)] = payload
+        response = compression.reuse(Response(payload, mimetype="application/json"), etag)
+
+    return conditional(response, etag, last_modified)
+
+@bp.route("/api/timeseries")
+@login_required
+def timeseries_api():
+    """
+    Returns a time series of the user's spending as columnar JSON.
+
+    - `view`: `spending` (resampled, the default), `rolling` (7/30-day sums),
+      `cumulative` (per category) or `mom` (month-over-month change).
+    - `freq`: `D`, `W` or `M` (default) for the `spending` view.
+    - Computed from the per-day rollups and tagged with an ETag per data version.
+    """
+    from timeseries import FREQUENCIES, VIEW_FREQUENCIES, VIEWS, resample_spending, to_json
+
+    view = request.args.get("view", "spending")
+    freq = request.args.get("freq", "M").upper()
+    if view not in VIEWS or freq not in FREQUENCIES:
+        abort(400)
+
+    user_id = session["userId"]
+    aggregates = get_aggregates(user_id)
+    etag = data_etag(user_id, f"{session['data_version']}:{view}:{freq}")
+    last_modified = transaction_cache.modified(user_id)
+    if not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        frame = resample_spending(aggregates, freq) if view == "spending" else VIEWS[view](aggregates)
+        response = compression.reuse(
+            jsonify(view=view, freq=VIEW_FREQUENCIES.get(view, freq), **to_json(frame)), etag)
+
+    return conditional(response, etag, last_modified)
 
-@app.route("/about")
+@bp.route("/api/insights")
+@login_required
+def insights_api():
+    """
+    Returns the user's unusual transactions and recurring charges as JSON.
+
+    - Unusual: totals with a robust z-score above 3.5 for their category and weekday.
+    - Recurring: the same category and amount charged at a regular interval.
+    - Detected once per data version and tagged with an ETag per data version.
+    """
+    user_id = session["userId"]
+    version = load_transactions(user_id)[0]
+    etag = data_etag(user_id, f"insights:{version}")
+    last_modified = transaction_cache.modified(user_id)
+    if not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        version, transactions = load_history(user_id)
+        etag = data_etag(user_id, f"insights:{version}")
+        response = compression.reuse(jsonify(load_insights(user_id, version, transactions).to_dict()), etag)
+
+    return conditional(response, etag, last_modified)
+
+@bp.route("/plotly.min.js")
+def plotly_asset():
+    """Serves plotly.js once as a long-cache asset, versioned by the URL."""
+    from graphing import plotly_js
+
+    response = compression.reuse(Response(plotly_js(), mimetype="application/javascript"), "plotly.min.js")
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+@bp.route("/metrics")
+def metrics_endpoint():
+    """Exposes request, storage, stage and LLM metrics in the Prometheus text format."""
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+@bp.route("/about")
 @login_required
 def about():
     """
     Renders the About page by reading content from README.md.
     
-    - Converts Markdown content to HTML.
+    - Converts Markdown content to HTML, once per README.md modification.
+    - Answers with 304 while README.md is unchanged.
     - Redirects to login if the user is not authenticated.
     
     Returns:
         Rendered About page template if authenticated, otherwise a redirect to login.
     """
-    try:
-        with open("README.md", "r") as f:
-            markdown_content = f.read()
-        html_content = markdown.markdown(markdown_content)
-        return render_template("about.html", about_content=html_content)
-    except FileNotFoundError:
+    html_content, mtime = readme_html()
+    if html_content is None:
         return render_template("about.html", about_content="About page content not found.")
 
-@app.route("/logout")
+    etag = data_etag(session["userId"], f"about:{mtime}")
+    revalidate = "_flashes" not in session
+    if revalidate and not_modified(etag, mtime):
+        return conditional(Response(status=304), etag, mtime)
+    response = Response(render_template("about.html", about_content=html_content), mimetype="text/html")
+    return conditional(response, etag, mtime) if revalidate else response
+
+@bp.route("/logout")
 def logout():
     """Logs out the user by clearing session data."""
     session.clear()
     flash("You have been logged out successfully.", "success")
-    return redirect(url_for("login"))
+    return redirect(url_for("main.login"))
 
-@app.route("/login", methods=["GET", "POST"])
+@bp.route("/login", methods=["GET", "POST"])
 def login():
     """
     Handles user authentication.
@@ -120,32 +737,29 @@ def login():
     - Redirects to the home page if authentication succeeds.
     """
     if "username" in session:
-        return redirect(url_for("home"))
+        return redirect(url_for("main.home"))
         
     form = LoginForm()
-    global supabase
     
     if form.validate_on_submit():
         username = form.username.data
         password = hash_password(form.password.data)
 
-        # Query Supabase for user credentials
-        response = supabase.table("users").select("userId, username").eq(
-            "username", username).eq("password", password).execute()
+        # Look up the user's credentials
+        user = get_storage().find_user(username, password)
 
-        if response.data and len(response.data) > 0:
-            user = response.data[0]
+        if user is not None:
             session["userId"] = user["userId"]
             session["username"] = user["username"]
             
             flash("Login successful!", "success")
-            return redirect(url_for("home"))
+            return redirect(url_for("main.home"))
         else:
             flash("Invalid username or password. Please try again.", "error")
 
     return render_template("login.html", form=form)
 
-@app.route("/register", methods=["GET", "POST"])
+@bp.route("/register", methods=["GET", "POST"])
 def register():
     """
     Handles user registration.
@@ -156,7 +770,7 @@ def register():
     """
     
     if "username" in session:
-        return redirect(url_for("home"))
+        return redirect(url_for("main.home"))
         
     form = RegisterForm()
     if form.validate_on_submit():
@@ -167,10 +781,7 @@ def register():
         password = hash_password(form.password.data)  # Hash password before storing
 
         # Check if username exists
-        response = supabase.table("users").select(
-            "*").eq("username", username).execute()
-
-        if response.data and len(response.data) > 0:
+        if get_storage().username_exists(username):
             flash("Username already exists. Please choose a different one.", "error")
         else:
             # Insert new user
@@ -180,14 +791,14 @@ def register():
                 "email": email,
                 "password": password
             }
-            supabase.table("users").insert(new_user).execute()
+            get_storage().create_user(new_user)
 
             flash("Registration successful! Please log in.", "success")
-            return redirect(url_for("login"))
+            return redirect(url_for("main.login"))
 
     return render_template("register.html", form=form)
 
-@app.route("/transaction_log", methods=["GET", "POST"])
+@bp.route("/transaction_log", methods=["GET", "POST"])
 @login_required
 def transaction_log():
     """
@@ -195,7 +806,7 @@ def transaction_log():
 
     - Displays and validates the transaction form.
     - Extracts and formats transaction details.
-    - Stores the transaction in Supabase.
+    - Stores the transaction in the database.
     - Provides user feedback via flash messages.
     - Redirects to home on success or login if not authenticated.
     """
@@ -219,36 +830,235 @@ def transaction_log():
         }
 
         # Save transaction
-        global supabase
-        supabase.table("transactions").insert(new_transaction).execute()
+        inserted = get_storage().insert_transaction(new_transaction)
         
-        # Update transactions in session
-        response = supabase.table("transactions").select(
-            "*").eq("userId", session["userId"]).execute()
-        session['all_transactions'] = response.data
+        # Append the inserted row to the cache instead of re-fetching the table
+        version = transaction_cache.append(session["userId"], inserted)
+        aggregate_store.apply(session["userId"], version, inserted)
+        session["data_version"] = version
+        mark_written(session["userId"])
+        schedule_snapshot(session["userId"], version)
+        alert = budget_tracker.record(session["userId"], inserted)
 
         flash("Transaction logged successfully!", "success")
-        return redirect(url_for("home"))
+        if alert is not None:
+            flash(alert.message(), "warning")
+        return redirect(url_for("main.home"))
         
     return render_template("transaction_log.html", form=form)
 
-@app.route('/smartspending')
+@bp.route('/smartspending')
 @login_required
 def smartspending():
     """
     Generates financial recommendations based on the user's transaction history.
 
     - Verifies if the user is authenticated via session.
-    - If authenticated, analyzes the user's transaction data using an AI model.
-    - Uses the `invoke_llm` function to generate financial insights or recommendations.
-    - Renders a template displaying the generated insights (`ten_points`).
+    - Queues the LLM call on the background LLM pool, identical requests
+      for the same transaction set share one job and its cached result.
+    - Adds the user's unusual transactions and recurring charges to the prompt, and
+      their budget progress unless LLM_BUDGET_CONTEXT is off.
+    - Renders the recommendations (`ten_points`) right away if they are ready,
+      otherwise streams them point by point from `/smartspending/stream`.
     - Redirects to the login page if the user is not authenticated.
     """
-    global llm
-    global ten_points
-    if llm is None:
-        llm = create_llm()
-    if ten_points is None:
-        ten_points = invoke_llm(data=session['all_transactions'], llm=llm)
-        
-    return render_template("smartspending.html", ten_points=ten_points)
+    version, transactions = load_history(session["userId"])
+    context = llm_context(session["userId"])
+    key = transactions_digest(transactions)
+    if context:
+        key = hashlib.sha256(f"{key}:{json.dumps(context, sort_keys=True)}".encode()).hexdigest()
+    job = llm_jobs.submit(session["userId"], key, generate_recommendations, transactions,
+                          version, context, report_progress=True)
+
+    ten_points = job.result if job.status == DONE else None
+    return render_template("smartspending.html", ten_points=ten_points, job=job)
+
+@bp.route('/smartspending/status/<job_id>')
+@login_required
+def smartspending_status(job_id):
+    """Returns the status, and once finished the result, of a recommendation job."""
+    job = llm_jobs.get(job_id)
+    if job is None or job.owner != session["userId"]:
+        abort(404)
+    return jsonify(job.to_dict())
+
+@bp.route('/smartspending/stream/<job_id>')
+@login_required
+def smartspending_stream(job_id):
+    """
+    Streams a recommendation job over Server-Sent Events.
+
+    - Sends a `point` event for each recommendation as soon as it is complete.
+    - Ends with a `done` event, or a `failed` event if the job errored.
+    """
+    job = llm_jobs.get(job_id)
+    if job is None or job.owner != session["userId"]:
+        abort(404)
+
+    def events():
+        for point in job.follow():
+            if point is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: point\ndata: {json.dumps(point)}\n\n"
+        if job.status == ERROR:
+            yield f"event: failed\ndata: {json.dumps(job.error)}\n\n"
+        else:
+            yield "event: done\ndata: {}\n\n"
+
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@bp.route("/budgets", methods=["GET", "POST"])
+@login_required
+def budgets():
+    """
+    Lists the user's budgets with this month's spending and saves new ones.
+
+    - A budget caps one category, in one month or in every month, and warns
+      once spending reaches its threshold percentage.
+    - Saving a budget for a category and month that already has one replaces it.
+    """
+    user_id = session["userId"]
+    form = BudgetForm()
+    if form.validate_on_submit():
+        get_storage().save_budget({
+            "userId": user_id,
+            "budgetCategory": form.budgetCategory.data,
+            "budgetMonth": form.budgetMonth.data or None,
+            "budgetAmount": float(form.budgetAmount.data),
+            "budgetThreshold": form.budgetThreshold.data,
+        })
+        recompute_budgets(user_id)
+        mark_written(user_id)
+        flash("Budget saved!", "success")
+        return redirect(url_for("main.budgets"))
+
+    month = month_key(date.today())
+    return render_template("budgets.html", form=form, month=month,
+                           statuses=budget_status(user_id, month),
+                           budgets=get_storage().list_budgets(user_id))
+
+@bp.route("/budgets/<int:budget_id>/delete", methods=["POST"])
+@login_required
+def delete_budget(budget_id):
+    """Deletes one of the user's budgets."""
+    if not FlaskForm().validate_on_submit():
+        abort(400)
+    if not get_storage().delete_budget(session["userId"], budget_id):
+        abort(404)
+    recompute_budgets(session["userId"])
+    mark_written(session["userId"])
+    flash("Budget deleted.", "success")
+    return redirect(url_for("main.budgets"))
+
+@bp.route("/budgets/recompute", methods=["POST"])
+@login_required
+def recompute_budgets_view():
+    """Rebuilds the user's budget spending from their full history."""
+    if not FlaskForm().validate_on_submit():
+        abort(400)
+    recompute_budgets(session["userId"])
+    flash("Budget spending recomputed from your transaction history.", "success")
+    return redirect(url_for("main.budgets"))
+
+@bp.route("/import", methods=["GET", "POST"])
+@login_required
+def import_file():
+    """
+    Bulk imports transactions from an uploaded CSV or OFX file.
+
+    - Streams and validates the file row by row with the `TransactionForm` rules.
+    - Inserts valid rows in batches of IMPORT_BATCH_SIZE, reporting progress to
+      `/import/status` after every batch.
+    - Adds each stored batch to the user's budget counters and flashes the
+      budgets it pushed past their threshold.
+    - Refreshes the user's cached data and rollups once, at the end.
+    """
+    form = ImportForm()
+    if form.validate_on_submit():
+        user_id = session["userId"]
+        upload = form.file.data
+        file_format = upload.filename.rsplit(".", 1)[-1].lower()
+
+        def progress(result):
+            import_progress[user_id] = {"status": "running", **result.to_dict()}
+
+        progress(ImportResult())
+
+        # Latest status of each budget that moved up a level, keyed by budget and month
+        alerts = {}
+
+        def record_budgets(batch):
+            for transaction in batch:
+                alert = budget_tracker.record(user_id, transaction)
+                if alert is not None:
+                    alerts[(alert.budget.id, alert.month)] = alert
+
+        result = import_transactions(
+            upload.stream, file_format, user_id, get_storage(),
+            default_category=form.defaultCategory.data,
+            default_payment=form.defaultPayment.data,
+            batch_size=IMPORT_BATCH_SIZE,
+            progress=progress,
+            on_batch=record_budgets,
+        )
+        import_progress[user_id] = {"status": "done", **result.to_dict()}
+
+        # One refresh for the whole file instead of one per row
+        if result.imported:
+            session["data_version"] = transaction_cache.invalidate(user_id)
+            mark_written(user_id)
+            aggregate_store.invalidate(user_id)
+            schedule_snapshot(user_id, session["data_version"])
+
+        flash(f"Imported {result.imported} of {result.processed} rows "
+              f"({result.skipped} skipped, {result.rejected} rejected).",
+              "success" if result.imported else "warning")
+        for alert in alerts.values():
+            flash(alert.message(), "warning")
+        for error in result.errors:
+            flash(error, "error")
+        return redirect(url_for("main.home") if result.imported else url_for("main.import_file"))
+
+    return render_template("import.html", form=form)
+
+@bp.route("/import/status")
+@login_required
+def import_status():
+    """Returns the progress of the user's running or most recent import."""
+    return jsonify(import_progress.get(session["userId"], {"status": "idle"}))
+
+@bp.route("/export")
+@login_required
+def export():
+    """
+    Downloads the user's transaction history as CSV (default) or Parquet.
+
+    - Reads the history from storage in keyset-paginated chunks.
+    - Streams each chunk to the client as it is written, one row group per chunk for Parquet.
+    """
+    user_id = session["userId"]
+    file_format = request.args.get("format", "csv").lower()
+
+    if file_format == "csv":
+        body = stream_csv(get_storage(), user_id)
+        mimetype = "text/csv"
+    elif file_format == "parquet":
+        try:
+            body = stream_parquet(get_storage(), user_id)
+        except ImportError:
+            flash("Parquet export needs the pyarrow package, please use CSV instead.", "error")
+            return redirect(url_for("main.home"))
+        mimetype = "application/vnd.apache.parquet"
+    else:
+        abort(400)
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=transactions.{file_format}"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+app = create_app()
@@ -0,0 +1,12 @@
+"""
+ASGI entry point.
+
+Flask is a WSGI app; asgiref adapts it so it can be served by an ASGI server, e.g.
+    uvicorn asgi:application --workers 4
+Async views (`home`, `graphs_api`) run on their own event loop per request either way.
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+
+application = WsgiToAsgi(app)
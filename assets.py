@@ -0,0 +1,84 @@
+"""
+Content-hashed static asset URLs.
+`url_for('static', filename='css/home.css')` builds `/static/css/home.<hash>.css`, so a
+changed file gets a new URL and every asset can be cached for a year.
+"""
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from flask import send_from_directory
+
+HASH_LENGTH = 12
+ONE_YEAR = 31536000
+HASHED_NAME = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<suffix>\.[^./]+)$" % HASH_LENGTH)
+
+
+class AssetHasher:
+    """Content digests of the files in a static folder, recomputed when a file changes."""
+
+    def __init__(self, root: str):
+        self.root = root
+        # filename -> (mtime_ns, size, digest)
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def digest(self, filename: str) -> Optional[str]:
+        """Return the short content hash of a static file, or None if it does not exist."""
+        path = os.path.join(self.root, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._digests.get(filename)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+        with self._lock:
+            self._digests[filename] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def hashed(self, filename: str) -> str:
+        """Insert the content hash before the extension, e.g. css/home.css -> css/home.<hash>.css."""
+        digest = self.digest(filename)
+        stem, suffix = os.path.splitext(filename)
+        if digest is None or not suffix:
+            return filename
+        return f"{stem}.{digest}{suffix}"
+
+    def resolve(self, filename: str) -> Tuple[str, bool]:
+        """
+        Map a requested name back to the file on disk.
+
+        Returns:
+            Tuple of (filename, whether the hash in the name matches the current content)
+        """
+        match = HASHED_NAME.match(filename)
+        if match is None:
+            return filename, False
+        original = match.group("stem") + match.group("suffix")
+        return original, self.digest(original) == match.group("digest")
+
+
+def init_app(app) -> None:
+    """Serve `app`'s static folder under content-hashed names with a one-year max-age."""
+    hasher = AssetHasher(app.static_folder)
+
+    @app.url_defaults
+    def hash_static_filename(endpoint, values):
+        if endpoint == "static" and "filename" in values:
+            values["filename"] = hasher.hashed(values["filename"])
+
+    def static(filename):
+        original, current = hasher.resolve(filename)
+        # An outdated hash still gets the current file, just not cached for long
+        response = send_from_directory(app.static_folder, original, max_age=ONE_YEAR if current else 0)
+        if current:
+            response.headers["Cache-Control"] = f"public, max-age={ONE_YEAR}, immutable"
+        return response
+
+    app.view_functions["static"] = static
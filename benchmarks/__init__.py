@@ -0,0 +1 @@
+"""Benchmarks for the TransactionAI data paths."""
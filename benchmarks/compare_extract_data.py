@@ -0,0 +1,72 @@
+"""
+Compares the columnar `extract_data` against the original list-comprehension version.
+Reports wall time and DataFrame memory at 10k and 1M rows.
+
+Usage:
+    python -m benchmarks.compare_extract_data [rows ...]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from benchmarks.generator import generate_transactions
+from extract_data import extract_data
+
+
+def legacy_extract_data(all_transactions) -> pd.DataFrame:
+    """The original implementation, kept verbatim for comparison."""
+    date = [t.get('transactionDate') for t in all_transactions]
+    items = [int(t.get('transactionItems')) for t in all_transactions]
+    subtotal = [round(float(t.get('transactionSubtotal')), 2) for t in all_transactions]
+    taxes = [round(float(t.get('transactionTaxes')), 2) for t in all_transactions]
+    total = [round(float(t.get('transactionTotal')), 2) for t in all_transactions]
+    categories = [t.get('transactionCategory') for t in all_transactions]
+    cash_or_credit = [t.get('transactionPayment') for t in all_transactions]
+
+    df = pd.DataFrame(
+        {'Date': date,
+         'Items': items,
+         'Subtotal': subtotal,
+         'Taxes': taxes,
+         'Total': total,
+         'Category': categories,
+         'Payment Method': cash_or_credit
+         }
+    )
+
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Datetime'] = df['Date'].dt.strftime('%Y-%m-%d')
+    df['Month'] = df['Date'].dt.month_name()
+    month_order = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+    df['Month'] = pd.Categorical(df['Month'], categories=month_order, ordered=True)
+    df['Year'] = df['Date'].dt.year
+    df['Weekday'] = df['Date'].dt.day_name()
+    weekday_order = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+    df['Weekday'] = pd.Categorical(df['Weekday'], categories=weekday_order, ordered=True)
+
+    df = df.sort_values(by=['Date'], ignore_index=True)
+    df.reset_index(drop=True, inplace=True)
+
+    return df
+
+
+def measure(function, records):
+    """Returns (seconds, DataFrame bytes) for one call."""
+    started = time.perf_counter()
+    df = function(records)
+    elapsed = time.perf_counter() - started
+    return elapsed, int(df.memory_usage(deep=True).sum())
+
+
+def main(sizes):
+    print(f"{'rows':>10} {'impl':>8} {'seconds':>9} {'MiB':>9}")
+    for rows in sizes:
+        records = generate_transactions(rows)
+        for name, function in (("legacy", legacy_extract_data), ("columnar", extract_data)):
+            seconds, size = measure(function, records)
+            print(f"{rows:>10} {name:>8} {seconds:>9.3f} {size / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 1_000_000])
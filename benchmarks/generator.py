@@ -0,0 +1,51 @@
+"""
+Seeded synthetic transaction generator.
+Produces records shaped like the rows `transaction_log()` writes from `TransactionForm`.
+"""
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List
+
+from forms import CATEGORY_CHOICES, PAYMENT_CHOICES
+
+CATEGORIES = [value for value, _ in CATEGORY_CHOICES]
+PAYMENTS = [value for value, _ in PAYMENT_CHOICES]
+TAX_RATE = 0.08875
+
+
+def iter_transactions(rows: int, user_id: int = 1, seed: int = 0,
+                      start: date = date(2020, 1, 1), days: int = 5 * 365,
+                      with_ids: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Yield `rows` random transactions, the same sequence for the same seed.
+
+    Args:
+        rows: Number of transactions
+        user_id: userId stamped on every row
+        seed: Random seed
+        start: Earliest transaction date
+        days: Number of days the dates are spread over
+        with_ids: Include a sequential transactionId, as rows read back from the database have
+    """
+    rng = random.Random(seed)
+    for i in range(rows):
+        subtotal = round(rng.lognormvariate(3.2, 0.9), 2)
+        taxes = round(subtotal * TAX_RATE, 2)
+        transaction = {
+            "userId": user_id,
+            "transactionDate": (start + timedelta(days=rng.randrange(days))).isoformat(),
+            "transactionSubtotal": subtotal,
+            "transactionItems": rng.randint(1, 12),
+            "transactionTaxes": taxes,
+            "transactionTotal": round(subtotal + taxes, 2),
+            "transactionCategory": rng.choice(CATEGORIES),
+            "transactionPayment": rng.choice(PAYMENTS),
+        }
+        if with_ids:
+            transaction["transactionId"] = i + 1
+        yield transaction
+
+
+def generate_transactions(rows: int, **kwargs) -> List[Dict[str, Any]]:
+    """Return `rows` random transactions as a list, see `iter_transactions`."""
+    return list(iter_transactions(rows, **kwargs))
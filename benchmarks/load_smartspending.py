@@ -0,0 +1,148 @@
+"""
+Load harness for /smartspending against the offline fake LLM.
+
+Seeds users into a throwaway SQLite database and drives the full request path
+concurrently: GET /smartspending, then follow the SSE stream until the last
+recommendation arrives. Reports throughput and latency percentiles as JSON,
+which is what the LLM worker pool (LLM_WORKERS) should be sized against.
+
+Usage:
+    python -m benchmarks.load_smartspending [--users 20] [--requests 200] [--concurrency 16]
+        [--latency 2.0] [--jitter 0.5] [--failure-rate 0.0] [--llm-workers 4] [--mode cold]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.generator import iter_transactions
+
+
+def configure(args) -> None:
+    """Point the app at a fresh SQLite database and the fake LLM before it is imported."""
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(), "load.db")
+    os.environ.setdefault("SECRET_KEY", "load-test")
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["LLM_WORKERS"] = str(args.llm_workers)
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_JITTER"] = str(args.jitter)
+    os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.failure_rate)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+
+
+def seed_users(storage, users: int, rows: int, seed: int) -> List[Dict[str, Any]]:
+    """Create `users` accounts with `rows` transactions each."""
+    accounts = []
+    for n in range(users):
+        user = storage.create_user({"name": f"Load {n}", "username": f"load{n}",
+                                    "email": f"load{n}@example.com", "password": "x"})
+        for transaction in iter_transactions(rows, user_id=user["userId"], seed=seed + n,
+                                             with_ids=False):
+            storage.insert_transaction(transaction)
+        accounts.append(user)
+    return accounts
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=500, help="Transactions per user")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=2.0, help="Fake LLM base latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Fake LLM extra random latency (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-workers", type=int, default=4)
+    parser.add_argument("--mode", choices=["cold", "warm"], default="cold",
+                        help="cold logs a transaction before each request so no result is cached")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    configure(args)
+    import app as app_module
+    flask_app = app_module.app
+    flask_app.config["WTF_CSRF_ENABLED"] = False
+
+    accounts = seed_users(app_module.get_storage(), args.users, args.rows, args.seed)
+    local = threading.local()
+
+    def client_for(account):
+        # One test client per (thread, user), each holds that user's session
+        clients = getattr(local, "clients", None)
+        if clients is None:
+            clients = local.clients = {}
+        if account["userId"] not in clients:
+            client = flask_app.test_client()
+            with client.session_transaction() as session:
+                session["userId"] = account["userId"]
+                session["username"] = account["username"]
+            clients[account["userId"]] = client
+        return clients[account["userId"]]
+
+    def one_request(n: int) -> Dict[str, Any]:
+        account = accounts[n % len(accounts)]
+        client = client_for(account)
+        if args.mode == "cold":
+            client.post("/transaction_log", data={
+                "transactionDate": "2024-01-01", "transactionSubtotal": "10.00",
+                "transactionCategory": "Food", "transactionItems": "1",
+                "transactionTaxes": "0.89", "transactionTotal": "10.89",
+                "transactionPayment": "Cash"})
+
+        started = time.perf_counter()
+        page = client.get("/smartspending")
+        first_byte = time.perf_counter() - started
+        ok = page.status_code == 200
+        match = re.search(rb"/smartspending/stream/(\w+)", page.data)
+        if ok and match:
+            events = client.get(f"/smartspending/stream/{match.group(1).decode()}").get_data(as_text=True)
+            ok = "event: done" in events
+        return {"ok": ok, "page_seconds": first_byte, "total_seconds": time.perf_counter() - started}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        samples = list(pool.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    succeeded = [s for s in samples if s["ok"]]
+    totals = [s["total_seconds"] for s in succeeded] or [0.0]
+    pages = [s["page_seconds"] for s in samples]
+    report = {
+        "config": vars(args),
+        "requests": len(samples),
+        "succeeded": len(succeeded),
+        "failed": len(samples) - len(succeeded),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(succeeded) / elapsed,
+        "page_latency_seconds": {q: percentile(pages, q) for q in (50, 95, 99)},
+        "end_to_end_latency_seconds": {q: percentile(totals, q) for q in (50, 95, 99)},
+    }
+    print(f"{len(succeeded)}/{len(samples)} ok in {elapsed:.2f}s, "
+          f"{report['throughput_rps']:.2f} req/s, p95 {report['end_to_end_latency_seconds'][95]:.2f}s",
+          file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark suite for the dashboard and recommendation data paths.
+
+Times each stage on synthetic histories and records its peak traced memory,
+then writes machine-readable JSON so runs can be compared across commits.
+
+Usage:
+    python -m benchmarks.run [--sizes 1000 100000 1000000] [--repeat 3] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks.generator import generate_transactions
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+
+def fake_recommendations_llm():
+    """A LangChain chat model that answers with schema-valid recommendations, offline."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    answer = json.dumps({f"point_{i}": f"Recommendation {i}." for i in range(1, 11)})
+    return FakeListChatModel(responses=[answer])
+
+
+def load_app():
+    """Import the Flask app against a throwaway SQLite database."""
+    os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+    os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import app
+    return app
+
+
+def time_call(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Best and mean wall time over `repeat` runs, then one traced run for peak memory."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_seconds": min(timings),
+        "mean_seconds": sum(timings) / len(timings),
+        "peak_mib": peak / 2**20,
+    }
+
+
+def run_size(rows: int, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    """Run every stage against one synthetic history."""
+    from aggregates import UserAggregates
+    from extract_data import extract_data
+    from graphing import generate_graphs
+    from smartAI import invoke_llm
+
+    app_module = load_app()
+    flask_app = app_module.app
+
+    records = generate_transactions(rows, seed=seed)
+    df = extract_data(records)
+    aggregates = UserAggregates.from_frame(df)
+    llm = fake_recommendations_llm()
+
+    def render_home():
+        with flask_app.test_request_context("/home"):
+            flask_app.jinja_env.get_template("home.html").render(
+                username="benchmark",
+                total_transactions=rows,
+                first_page={"transactions": records[:app_module.PAGE_SIZE], "next_cursor": None},
+                page_size=app_module.PAGE_SIZE,
+                plotly_version="benchmark",
+            )
+
+    stages = {
+        "extract_data": lambda: extract_data(records),
+        "aggregates_from_frame": lambda: UserAggregates.from_frame(df),
+        "generate_graphs": lambda: generate_graphs(aggregates),
+        "render_home": render_home,
+        "invoke_llm_fake": lambda: invoke_llm(records, llm),
+    }
+
+    results = []
+    for stage, function in stages.items():
+        result = {"rows": rows, "stage": stage, **time_call(function, repeat)}
+        print(f"{rows:>10} {stage:<22} {result['best_seconds']:>9.4f}s {result['peak_mib']:>9.1f} MiB",
+              file=sys.stderr)
+        results.append(result)
+    return results
+
+
+def git_revision() -> str:
+    """Current commit, so results can be compared across commits."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    for rows in args.sizes:
+        results.extend(run_size(rows, args.repeat, args.seed))
+
+    report = {
+        "commit": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
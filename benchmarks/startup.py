@@ -0,0 +1,106 @@
+"""
+Startup-time report for the web app.
+
+Imports the app in a fresh interpreter under `python -X importtime`, then reports
+the total import time, the peak RSS of that interpreter, and a per-module and
+per-package breakdown as JSON. This is what a worker pays on every boot.
+
+Usage:
+    python -m benchmarks.startup [--module app] [--top 25] [--repeat 3] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from benchmarks.run import git_revision
+
+# "import time:       self [us] |  cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+PROBE = (
+    "import resource, sys\n"
+    "import {module}\n"
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, len(sys.modules))\n"
+)
+
+
+def measure(module: str) -> Dict[str, Any]:
+    """Import `module` once in a fresh interpreter and parse its -X importtime output."""
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "startup")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    rss_kib, loaded = completed.stdout.split()
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                # importtime indents nested imports by two spaces per level
+                "depth": (len(indent) - 1) // 2,
+            })
+    return {"modules": modules, "peak_rss_mib": int(rss_kib) / 1024, "loaded_modules": int(loaded)}
+
+
+def by_package(modules: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Self time summed per top-level package, in milliseconds, largest first."""
+    totals: Dict[str, float] = defaultdict(float)
+    for entry in modules:
+        totals[entry["module"].split(".")[0]] += entry["self_ms"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Modules and packages to list")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs to take the fastest of, the first one may hit a cold disk cache")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: sum(m["self_ms"] for m in run["modules"]))
+    total_ms = sum(m["self_ms"] for m in best["modules"])
+    top_level = [m for m in best["modules"] if m["depth"] == 0]
+
+    report = {
+        "commit": git_revision(),
+        "python": sys.version.split()[0],
+        "module": args.module,
+        "total_import_ms": total_ms,
+        "peak_rss_mib": best["peak_rss_mib"],
+        "loaded_modules": best["loaded_modules"],
+        "packages_self_ms": dict(list(by_package(best["modules"]).items())[:args.top]),
+        "top_level_cumulative_ms": {m["module"]: m["cumulative_ms"] for m in
+                                    sorted(top_level, key=lambda m: m["cumulative_ms"],
+                                           reverse=True)[:args.top]},
+        "slowest_modules_self_ms": {m["module"]: m["self_ms"] for m in
+                                    sorted(best["modules"], key=lambda m: m["self_ms"],
+                                           reverse=True)[:args.top]},
+    }
+    print(f"import {args.module}: {total_ms:.0f} ms, {best['peak_rss_mib']:.1f} MiB peak RSS, "
+          f"{best['loaded_modules']} modules", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Per-category monthly budgets and spending alerts.
+Spend is kept as running (month, category) counters per user, so logging or importing a
+transaction updates one counter and checks only that category's budget for that month.
+"""
+import itertools
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from aggregates import UserAggregates
+
+OK = "ok"
+WARNING = "warning"
+EXCEEDED = "exceeded"
+LEVELS = (OK, WARNING, EXCEEDED)
+
+# Shared across users so a reloaded user never reuses an old revision
+_revisions = itertools.count(1)
+
+
+def month_key(value) -> str:
+    """The "YYYY-MM" month of a transaction date (ISO string or date)."""
+    return str(value)[:7]
+
+
+class Budget:
+    """A spending limit for one category, in one month or in every month."""
+
+    def __init__(self, row: Dict[str, Any]):
+        self.id = row.get("budgetId")
+        self.category = row["budgetCategory"]
+        # None means the budget applies to every month
+        self.month: Optional[str] = row.get("budgetMonth") or None
+        self.amount = float(row["budgetAmount"])
+        self.threshold = int(row.get("budgetThreshold") or 80)
+
+    def level(self, spent: float) -> str:
+        """How spending compares to the limit: ok, warning (past the threshold) or exceeded."""
+        if spent > self.amount:
+            return EXCEEDED
+        if spent >= self.amount * self.threshold / 100:
+            return WARNING
+        return OK
+
+
+class BudgetStatus:
+    """A budget's spending in one month."""
+
+    def __init__(self, budget: Budget, month: str, spent: float):
+        self.budget = budget
+        self.month = month
+        self.spent = spent
+        self.level = budget.level(spent)
+
+    @property
+    def percent(self) -> float:
+        return self.spent / self.budget.amount * 100 if self.budget.amount else 0.0
+
+    def message(self) -> str:
+        """One-line alert text, for flash messages and the LLM context."""
+        verb = "is over" if self.level == EXCEEDED else "has reached"
+        return (f"{self.budget.category} spending for {self.month} {verb} {self.percent:.0f}% "
+                f"of its ${self.budget.amount:.2f} budget (${self.spent:.2f} spent).")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"budgetId": self.budget.id, "category": self.budget.category, "month": self.month,
+                "amount": self.budget.amount, "threshold": self.budget.threshold,
+                "spent": round(self.spent, 2), "percent": round(self.percent, 1), "level": self.level}
+
+
+class _UserBudgets:
+    """One user's budgets, indexed by (category, month), and spend counters."""
+
+    def __init__(self, budgets: Iterable[Dict[str, Any]], spend: Dict[Tuple[str, str], float]):
+        self.budgets: Dict[Tuple[str, Optional[str]], Budget] = {
+            (budget.category, budget.month): budget for budget in map(Budget, budgets)}
+        self.spend: Dict[Tuple[str, str], float] = defaultdict(float, spend)
+        self.revision = next(_revisions)
+
+    def budget_for(self, category: str, month: str) -> Optional[Budget]:
+        """The month's own budget for a category, else its every-month budget."""
+        return self.budgets.get((category, month)) or self.budgets.get((category, None))
+
+
+class BudgetTracker:
+    """
+    Per-user budget state with LRU/TTL eviction.
+
+    - `record` is O(1): one counter update and one budget lookup per transaction.
+    - A user's counters are only built by `load`, from their full rollups, the first
+      time their budgets are looked at. Transactions recorded before that are
+      already part of the rollups, so they are skipped.
+    - A transaction recorded while `load` is reading the rollups can be missed;
+      `load` is also the batch recompute path that repairs such drift.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 900):
+        self._users = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def loaded(self, user_id) -> bool:
+        """Whether the user's counters are in memory."""
+        with self._lock:
+            return user_id in self._users
+
+    def load(self, user_id, budgets: Iterable[Dict[str, Any]],
+             spend: Dict[Tuple[str, str], float]) -> None:
+        """
+        Replace a user's budgets and counters.
+
+        Args:
+            user_id: Id of the user
+            budgets: Budget rows from storage
+            spend: Total spent per (month, category), e.g. from `month_category_totals`
+        """
+        state = _UserBudgets(budgets, spend)
+        with self._lock:
+            self._users[user_id] = state
+
+    def record(self, user_id, transaction: Dict[str, Any]) -> Optional[BudgetStatus]:
+        """
+        Add a logged transaction to the user's counters.
+
+        Returns:
+            BudgetStatus: The budget's new status if this transaction moved it to a
+                          higher alert level, otherwise None
+        """
+        month = month_key(transaction.get("transactionDate"))
+        category = transaction.get("transactionCategory")
+        total = round(float(transaction.get("transactionTotal")), 2)
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None:
+                return None
+            before = state.spend[(month, category)]
+            after = state.spend[(month, category)] = before + total
+            state.revision = next(_revisions)
+            budget = state.budget_for(category, month)
+        if budget is None:
+            return None
+        if LEVELS.index(budget.level(after)) > LEVELS.index(budget.level(before)):
+            return BudgetStatus(budget, month, after)
+        return None
+
+    def status(self, user_id, month: str) -> List[BudgetStatus]:
+        """Every budget that applies to `month`, most urgent first."""
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None:
+                return []
+            categories = {category for category, _ in state.budgets}
+            statuses = [BudgetStatus(budget, month, state.spend.get((month, category), 0.0))
+                        for category in categories
+                        for budget in [state.budget_for(category, month)] if budget is not None]
+        return sorted(statuses, key=lambda s: (-LEVELS.index(s.level), -s.percent, s.budget.category))
+
+    def revision(self, user_id) -> int:
+        """Changes whenever the user's budgets or spend change, 0 when not loaded."""
+        with self._lock:
+            state = self._users.get(user_id)
+            return state.revision if state is not None else 0
+
+    def invalidate(self, user_id) -> None:
+        """Drop a user's budgets and counters, they are rebuilt on the next look-up."""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+
+def month_category_totals(aggregates: UserAggregates) -> Dict[Tuple[str, str], float]:
+    """Total spent per (month, category), summed from the per-day rollups."""
+    totals: Dict[Tuple[str, str], float] = defaultdict(float)
+    for (day, category), total in aggregates.daily_totals.items():
+        totals[(month_key(day), category)] += total
+    return totals
+
+
+def budget_context(statuses: List[BudgetStatus]) -> List[str]:
+    """Lines describing budget progress, for the LLM prompt."""
+    return [f"{s.budget.category} ({s.month}): {s.spent:.2f} of {s.budget.amount:.2f} spent "
+            f"({s.percent:.0f}%, {s.level})" for s in statuses]
@@ -0,0 +1,107 @@
+"""
+Response compression for large HTML and JSON bodies.
+Picks zstd, brotli or gzip from the client's Accept-Encoding; brotli is only offered
+when the optional `brotli` package is installed.
+
+Bodies marked with `reuse` are compressed once per encoding and the bytes are kept,
+so cached payloads and static bundles are not recompressed on every request.
+"""
+import gzip
+import threading
+from typing import Callable, Dict, Hashable, Optional
+
+from cachetools import TTLCache
+from flask import request
+
+MIN_SIZE = 1024
+# Total size of the compressed bodies kept for `reuse`d responses
+CACHE_BYTES = 64 * 1024 * 1024
+CACHE_TTL = 900
+COMPRESSIBLE_MIMETYPES = {
+    "text/html", "text/css", "text/plain", "text/csv",
+    "application/json", "application/javascript",
+}
+
+
+def _zstd() -> Optional[Callable[[bytes], bytes]]:
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    # ZstdCompressor objects are not thread-safe, use a fresh one per response
+    return lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def _brotli() -> Optional[Callable[[bytes], bytes]]:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return lambda data: brotli.compress(data, quality=5)
+
+
+def available_encodings() -> Dict[str, Callable[[bytes], bytes]]:
+    """Content codings this process can produce, in order of preference."""
+    encodings = {}
+    for name, factory in (("zstd", _zstd), ("br", _brotli)):
+        compress = factory()
+        if compress is not None:
+            encodings[name] = compress
+    encodings["gzip"] = lambda data: gzip.compress(data, compresslevel=6)
+    return encodings
+
+
+def reuse(response, key: Hashable):
+    """
+    Mark a response whose body is the same for every response marked with `key`.
+
+    Its compressed bytes are cached per (key, encoding), so `key` must change
+    whenever the body does, e.g. a data version or the ETag.
+    """
+    response.compression_key = key
+    return response
+
+
+def init_app(app, min_size: int = MIN_SIZE, cache_bytes: int = CACHE_BYTES,
+             cache_ttl: int = CACHE_TTL) -> None:
+    """Compress `app`'s buffered HTML, JSON and text responses of at least `min_size` bytes."""
+    encodings = available_encodings()
+    compressed = TTLCache(maxsize=cache_bytes, ttl=cache_ttl, getsizeof=len)
+    compressed_lock = threading.Lock()
+
+    def compress(data: bytes, encoding: str, key: Optional[Hashable]) -> bytes:
+        if key is None:
+            return encodings[encoding](data)
+        with compressed_lock:
+            body = compressed.get((key, encoding))
+        if body is None:
+            body = encodings[encoding](data)
+            # Bodies larger than the whole cache are not kept
+            if len(body) <= cache_bytes:
+                with compressed_lock:
+                    compressed[(key, encoding)] = body
+        return body
+
+    @app.after_request
+    def compress_response(response):
+        response.vary.add("Accept-Encoding")
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        accepted = request.accept_encodings
+        encoding = next((name for name in encodings if accepted[name]), None)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(compress(data, encoding, getattr(response, "compression_key", None)))
+        response.headers["Content-Encoding"] = encoding
+        # The compressed bytes differ from the identity ones, keep validators weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
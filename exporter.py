@@ -0,0 +1,114 @@
+"""
+Streaming export of a user's transaction history as CSV or Parquet.
+Rows are read from storage in keyset-paginated chunks and written out chunk by chunk,
+so neither the worker nor the client holds the full history in memory.
+"""
+import csv
+import io
+from datetime import date
+from importlib.util import find_spec
+from typing import Any, Dict, Iterator, List
+
+EXPORT_COLUMNS = (
+    "transactionId", "transactionDate", "transactionItems", "transactionSubtotal",
+    "transactionTaxes", "transactionTotal", "transactionCategory", "transactionPayment",
+)
+
+# Parquet export needs the optional pyarrow package, checked without importing it
+PARQUET_AVAILABLE = find_spec("pyarrow") is not None
+
+
+def iter_pages(storage, user_id, page_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the user's transactions page by page, newest first."""
+    after = None
+    while True:
+        page = storage.page_transactions(user_id, page_size, after=after, columns=EXPORT_COLUMNS)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after = (page[-1]["transactionDate"], page[-1]["transactionId"])
+
+
+def stream_csv(storage, user_id, page_size: int = 5000) -> Iterator[str]:
+    """
+    Yield CSV text, one chunk per storage page.
+
+    The header uses the Supabase column names, so the file can be re-imported as is.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for page in iter_pages(storage, user_id, page_size):
+        writer.writerows([row.get(column) for column in EXPORT_COLUMNS] for row in page)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the response generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_parquet(storage, user_id, page_size: int = 50_000) -> Iterator[bytes]:
+    """
+    Yield a Parquet file, one row group per storage page.
+
+    Requires pyarrow, which is imported lazily so the rest of the app does not depend on it.
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("transactionId", pa.int64()),
+        ("transactionDate", pa.date32()),
+        ("transactionItems", pa.int32()),
+        ("transactionSubtotal", pa.float64()),
+        ("transactionTaxes", pa.float64()),
+        ("transactionTotal", pa.float64()),
+        ("transactionCategory", pa.dictionary(pa.int8(), pa.string())),
+        ("transactionPayment", pa.dictionary(pa.int8(), pa.string())),
+    ])
+
+    def generate():
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for page in iter_pages(storage, user_id, page_size):
+                columns = {column: [row.get(column) for row in page] for column in EXPORT_COLUMNS}
+                columns["transactionDate"] = [date.fromisoformat(str(d)[:10])
+                                              for d in columns["transactionDate"]]
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+    return generate()
@@ -1,39 +1,54 @@
 import pandas as pd
 
+from aggregates import MONTH_ORDER, WEEKDAY_ORDER
+from metrics import timed
+
+# Supabase column -> DataFrame column
+COLUMNS = {
+    'transactionDate': 'Date',
+    'transactionItems': 'Items',
+    'transactionSubtotal': 'Subtotal',
+    'transactionTaxes': 'Taxes',
+    'transactionTotal': 'Total',
+    'transactionCategory': 'Category',
+    'transactionPayment': 'Payment Method',
+}
+MONEY_COLUMNS = ['Subtotal', 'Taxes', 'Total']
+
+@timed("extract_data")
 def extract_data(all_transactions) -> pd.DataFrame:
-    date = [t.get('transactionDate') for t in all_transactions]
-    items = [int(t.get('transactionItems')) for t in all_transactions]
-    subtotal = [round(float(t.get('transactionSubtotal')), 2) for t in all_transactions]
-    taxes = [round(float(t.get('transactionTaxes')), 2) for t in all_transactions]
-    total = [round(float(t.get('transactionTotal')), 2) for t in all_transactions]
-    categories = [t.get('transactionCategory') for t in all_transactions]
-    cash_or_credit = [t.get('transactionPayment') for t in all_transactions]
-
-    df = pd.DataFrame(
-        {'Date': date,
-         'Items': items,
-         'Subtotal': subtotal,
-         'Taxes': taxes,
-         'Total': total,
-         'Category': categories,
-         'Payment Method': cash_or_credit
-         }
-    )
-
-    # Ensure Date is datetime type
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['Datetime'] = df['Date'].dt.strftime('%Y-%m-%d')
-    df['Month'] = df['Date'].dt.month_name()
-    month_order = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-    df['Month'] = pd.Categorical(df['Month'], categories=month_order, ordered=True)
+    """
+    Builds the transaction DataFrame used by the dashboard in one columnar pass.
+
+    Args:
+        all_transactions (list): Transaction records as returned by Supabase.
+
+    Returns:
+        pd.DataFrame: One row per transaction sorted by date, with categorical
+                      Category/Payment Method/Month/Weekday columns, int32 items
+                      and float64 money columns rounded to cents.
+    """
+    df = pd.DataFrame.from_records(all_transactions, columns=list(COLUMNS))
+    df = df.rename(columns=COLUMNS)
+
+    # Dates are stored as ISO 8601 strings, parse them without format inference
+    raw_dates = df['Date'].astype(str)
+    df['Date'] = pd.to_datetime(raw_dates, format='ISO8601')
+    df['Items'] = pd.to_numeric(df['Items']).astype('int32')
+    for column in MONEY_COLUMNS:
+        df[column] = pd.to_numeric(df[column]).astype('float64').round(2)
+    df['Category'] = df['Category'].astype('category')
+    df['Payment Method'] = df['Payment Method'].astype('category')
+
+    df['Datetime'] = raw_dates.str.slice(0, 10)
+    df['Month'] = pd.Categorical.from_codes(
+        df['Date'].dt.month.to_numpy() - 1, categories=MONTH_ORDER, ordered=True)
     df['Year'] = df['Date'].dt.year
-    df['Weekday'] = df['Date'].dt.day_name()
-    weekday_order = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-    df['Weekday'] = pd.Categorical(df['Weekday'], categories=weekday_order, ordered=True)
-     
+    # dayofweek is Monday=0, the display order starts on Sunday
+    df['Weekday'] = pd.Categorical.from_codes(
+        (df['Date'].dt.dayofweek.to_numpy() + 1) % 7, categories=WEEKDAY_ORDER, ordered=True)
+
     # sort by date
-    
-    df = df.sort_values(by=['Date'], ignore_index=True)
-    df.reset_index(drop=True, inplace=True)
-        
-    return df
\ No newline at end of file
+    df = df.sort_values(by=['Date'], ignore_index=True, kind='stable')
+
+    return df
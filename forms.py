@@ -1,6 +1,9 @@
 # Importing FlaskForm base class to create web forms
 from flask_wtf import FlaskForm
 
+# File upload field and validators for the bulk import form
+from flask_wtf.file import FileAllowed, FileField, FileRequired
+
 # Importing various field types to use in the forms
 from wtforms import (
     DateField,            # For selecting a date (e.g., transaction date)
@@ -15,6 +18,21 @@ from wtforms import (
 
 # Validators ensure form fields meet conditions before accepting submission
 from wtforms.validators import DataRequired  # Ensures field is not empty
+from wtforms.validators import NumberRange, Optional, Regexp  # Bounds, optional fields and patterns
+
+# Choices shared by the transaction form and anything else that validates transactions
+CATEGORY_CHOICES = [
+    ("Food", "Food"),
+    ("Entertainment", "Entertainment"),
+    ("Clothing", "Clothing"),
+    ("Transportation", "Transportation"),
+    ("Utilities", "Utilities"),
+    ("Health", "Health"),
+    ("Personal", "Personal"),
+    ("Gift", "Gift"),
+    ("Other", "Other"),
+]
+PAYMENT_CHOICES = [("Cash", "Cash"), ("Credit", "Credit")]
 
 # ----------------------------- #
 # 📋 User Registration Form     #
@@ -70,17 +88,7 @@ class TransactionForm(FlaskForm):
     transactionCategory = SelectField(
         "Category",
         [DataRequired()],
-        choices=[
-            ("Food", "Food"),
-            ("Entertainment", "Entertainment"),
-            ("Clothing", "Clothing"),
-            ("Transportation", "Transportation"),
-            ("Utilities", "Utilities"),
-            ("Health", "Health"),
-            ("Personal", "Personal"),
-            ("Gift", "Gift"),
-            ("Other", "Other"),
-        ],
+        choices=CATEGORY_CHOICES,
     )
     
     # Integer input for number of items purchased (required)
@@ -96,8 +104,54 @@ class TransactionForm(FlaskForm):
     transactionPayment = SelectField(
         "Cash or Credit",
         [DataRequired()],
-        choices=[("Cash", "Cash"), ("Credit", "Credit")],
+        choices=PAYMENT_CHOICES,
     )
     
     # Submit button for logging the transaction
     submit = SubmitField("Log Transaction")
+
+
+# ----------------------------- #
+# 📥 Bulk Import Form           #
+# ----------------------------- #
+
+class ImportForm(FlaskForm):
+    # Bank export to import, CSV or OFX/QFX (required)
+    file = FileField(
+        "Transaction File",
+        validators=[FileRequired(), FileAllowed(["csv", "ofx", "qfx"], "CSV or OFX files only")],
+    )
+
+    # Category used for rows that do not carry one (e.g. OFX files)
+    defaultCategory = SelectField("Default Category", choices=CATEGORY_CHOICES, default="Other")
+
+    # Payment method used for rows that do not carry one
+    defaultPayment = SelectField("Default Payment", choices=PAYMENT_CHOICES, default="Credit")
+
+    # Submit button for starting the import
+    submit = SubmitField("Import Transactions")
+
+
+# ----------------------------- #
+# 🎯 Budget Form                #
+# ----------------------------- #
+
+class BudgetForm(FlaskForm):
+    # Category the budget applies to (required)
+    budgetCategory = SelectField("Category", [DataRequired()], choices=CATEGORY_CHOICES)
+
+    # Month as YYYY-MM, left empty for a budget that applies to every month
+    budgetMonth = StringField(
+        "Month (YYYY-MM, empty for every month)",
+        validators=[Optional(), Regexp(r"^\d{4}-(0[1-9]|1[0-2])$", message="Use the YYYY-MM format")],
+    )
+
+    # Spending limit for the month (required, positive)
+    budgetAmount = DecimalField("Monthly Limit", validators=[DataRequired(), NumberRange(min=0.01)])
+
+    # Percent of the limit at which to warn
+    budgetThreshold = IntegerField("Alert at (% of limit)", default=80,
+                                   validators=[DataRequired(), NumberRange(min=1, max=100)])
+
+    # Submit button for saving the budget
+    submit = SubmitField("Save Budget")
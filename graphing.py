@@ -1,50 +1,52 @@
+from concurrent.futures import Executor
+from typing import Optional
+
 import plotly.express as px
-from plotly.offline import plot
-from datetime import datetime
-from extract_data import extract_data
-import pandas as pd
+from plotly.offline import get_plotlyjs
+from aggregates import UserAggregates
+from metrics import timed
+from timeseries import monthly_spending, rolling_spending
 
-def generate_graphs(all_transactions):
-    """
-    Generates various interactive graphs to visualize transaction data.
+_plotly_js = None
 
-    This function takes a list of transaction data, processes it into a DataFrame,
-    and then creates several types of visualizations: pie charts and bar charts,
-    grouped by category, payment method, weekday, and month.
+def plotly_js():
+    """
+    Returns the plotly.js bundle shipped with the installed plotly package.
 
-    Args:
-        all_transactions (list): A list of dictionaries, where each dictionary
-                                  contains details about a transaction.
+    The bundle is read once per process and served as a single long-cache
+    asset instead of being inlined into every graph.
 
     Returns:
-        list: A list of Plotly graph HTML div elements containing the generated
-              charts, or None if no transactions are provided.
+        str: The minified plotly.js source.
     """
-    # Check if there are any transactions
-    if not all_transactions:
-        return None
-
-    graphs = []
-    df = extract_data(all_transactions)
+    global _plotly_js
+    if _plotly_js is None:
+        _plotly_js = get_plotlyjs()
+    return _plotly_js
 
-    category_spending = df.groupby('Category')['Total'].sum().reset_index()
+def category_pie(aggregates: UserAggregates) -> str:
+    """Pie chart of spending by category."""
+    category_spending = aggregates.category_spending()
     fig_cat_pie = px.pie(category_spending,
                          values='Total',
                          color='Category',
                          names='Category',
                          title='Spending Distribution by Category')
-    graphs.append(plot(fig_cat_pie, output_type="div"))
-
+    return fig_cat_pie.to_json()
 
-    payment_spending = df.groupby('Payment Method')['Total'].sum().reset_index()
+def payment_pie(aggregates: UserAggregates) -> str:
+    """Pie chart of spending by payment method."""
+    payment_spending = aggregates.payment_spending()
     fig_pay_pie = px.pie(payment_spending,
                          values='Total',
                          color='Payment Method',
                          names='Payment Method',
                          title='Spending Distribution by Payment Method')
-    graphs.append(plot(fig_pay_pie, output_type="div"))
+    return fig_pay_pie.to_json()
 
-    weekday_spending = df.groupby('Weekday')['Total'].mean().reset_index()
+def weekday_bar(aggregates: UserAggregates) -> str:
+    """Bar chart of average spending per day of the week."""
+    weekday_spending = aggregates.weekday_spending()
     fig_weekday_bar = px.bar(weekday_spending,
                              x='Weekday',
                              y='Total',
@@ -52,17 +54,58 @@ def generate_graphs(all_transactions):
                              title='Day of the Week Average Spending',
                              labels={'Total': 'Total Spending ($)', 'Weekday': 'Day of Week'})
     fig_weekday_bar.update_layout(xaxis_title='Day of Week', yaxis_title='Average Spending ($)')
-    graphs.append(plot(fig_weekday_bar, output_type="div"))
+    return fig_weekday_bar.to_json()
 
-    monthly_spending = df.groupby('Month')['Total'].sum().reset_index()
-    fig_month_bar = px.bar(monthly_spending,
+def monthly_bar(aggregates: UserAggregates) -> str:
+    """Bar chart of total spending per calendar month, across years."""
+    spending = monthly_spending(aggregates)
+    fig_month_bar = px.bar(spending,
                            x='Month',
                            y='Total',
-                           color="Month",
+                           color="Year",
                            title='Monthly Spending',
                            labels={'Total': 'Total Spending ($)', 'Month': 'Month'})
     fig_month_bar.update_layout(xaxis_title='Month', yaxis_title='Total Spending ($)')
-    graphs.append(plot(fig_month_bar, output_type="div"))
+    return fig_month_bar.to_json()
+
+def trend_line(aggregates: UserAggregates) -> str:
+    """Line chart of daily spending with rolling 7- and 30-day sums."""
+    rolling = rolling_spending(aggregates).reset_index()
+    fig_trend = px.line(rolling,
+                        x='Date',
+                        y=['7-day', '30-day'],
+                        title='Spending Trend (Rolling Sums)',
+                        labels={'value': 'Spending ($)', 'variable': 'Window'})
+    fig_trend.update_layout(xaxis_title='Date', yaxis_title='Spending ($)')
+    return fig_trend.to_json()
+
+# Dashboard figures, in display order
+FIGURES = (category_pie, payment_pie, weekday_bar, monthly_bar, trend_line)
 
+@timed("generate_graphs")
+def generate_graphs(aggregates: UserAggregates, executor: Optional[Executor] = None):
+    """
+    Generates various interactive graphs to visualize transaction data.
+
+    This function takes the user's precomputed spending rollups and creates
+    several types of visualizations: pie charts, bar charts and a trend line,
+    grouped by category, payment method, weekday, and calendar month.
+
+    Args:
+        aggregates (UserAggregates): The user's spending rollups, kept up to
+                                     date incrementally as transactions are logged.
+        executor (Executor, optional): Pool to build the figures on concurrently,
+                                       they are built one after another without it.
+
+    Returns:
+        list: A list of Plotly figure JSON documents (`fig.to_json()`) for the
+              generated charts, or None if no transactions are provided.
+    """
+    # Check if there are any transactions
+    if aggregates is None or aggregates.count == 0:
+        return None
 
-    return graphs
+    if executor is None:
+        return [figure(aggregates) for figure in FIGURES]
+    futures = [executor.submit(figure, aggregates) for figure in FIGURES]
+    return [future.result() for future in futures]
@@ -0,0 +1,237 @@
+"""
+Streaming import of bank history from CSV and OFX files.
+Rows are parsed one at a time, validated like `TransactionForm` and written in bounded batches,
+so memory stays flat regardless of file size.
+"""
+import csv
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+
+from forms import CATEGORY_CHOICES, PAYMENT_CHOICES
+
+CATEGORIES = {value for value, _ in CATEGORY_CHOICES}
+PAYMENTS = {value for value, _ in PAYMENT_CHOICES}
+MAX_REPORTED_ERRORS = 20
+
+# Accepted CSV headers, lower-cased, for each transaction field
+CSV_ALIASES = {
+    "transactionDate": ("transactiondate", "date"),
+    "transactionItems": ("transactionitems", "items"),
+    "transactionSubtotal": ("transactionsubtotal", "subtotal"),
+    "transactionTaxes": ("transactiontaxes", "taxes", "tax"),
+    "transactionTotal": ("transactiontotal", "total", "amount"),
+    "transactionCategory": ("transactioncategory", "category"),
+    "transactionPayment": ("transactionpayment", "payment", "payment method"),
+}
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+class ImportResult:
+    """Running counts for one import, also used to report progress."""
+
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors: List[str] = []
+
+    @property
+    def rejected(self) -> int:
+        return self.processed - self.imported - self.skipped
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"processed": self.processed, "imported": self.imported,
+                "skipped": self.skipped, "rejected": self.rejected, "errors": self.errors}
+
+
+def parse_csv(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one raw transaction per CSV row.
+
+    Headers may use the Supabase column names or the dashboard names
+    (Date, Items, Subtotal, Taxes, Total, Category, Payment).
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    headers = {(h or "").strip().lower(): h for h in reader.fieldnames or []}
+    mapping = {}
+    for field, aliases in CSV_ALIASES.items():
+        for alias in aliases:
+            if alias in headers:
+                mapping[field] = headers[alias]
+                break
+    for row in reader:
+        yield {field: (row.get(header) or "").strip() for field, header in mapping.items()}
+
+
+def parse_ofx(stream: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one raw transaction per OFX/QFX <STMTTRN> block.
+
+    Handles both SGML (OFX 1.x, unclosed tags) and XML (OFX 2.x) files.
+    Only debits are spending, credits are yielded with `skip` set.
+    """
+    payment = None
+    current: Optional[Dict[str, str]] = None
+    buffer = ""
+    text = io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+
+    def finish(block):
+        amount = block.get("TRNAMT", "")
+        posted = block.get("DTPOSTED", "")
+        total = amount.lstrip("-")
+        raw = {
+            "transactionDate": f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}" if len(posted) >= 8 else None,
+            "transactionSubtotal": total,
+            "transactionTotal": total,
+            "skip": not amount.startswith("-"),
+        }
+        if payment:
+            raw["transactionPayment"] = payment
+        return raw
+
+    while True:
+        chunk = text.read(chunk_size)
+        buffer += chunk
+        # Keep a possibly incomplete trailing tag for the next chunk
+        cut = len(buffer) if not chunk else buffer.rfind("<")
+        for match in OFX_TAG.finditer(buffer, 0, max(cut, 0)):
+            closing, tag, value = match.group(1), match.group(2).upper(), match.group(3).strip()
+            if tag == "CCSTMTRS" and not closing:
+                payment = "Credit"
+            elif tag == "STMTTRN":
+                if current is not None:
+                    yield finish(current)
+                current = None if closing else {}
+            elif current is not None and not closing and value:
+                current[tag] = value
+        buffer = buffer[max(cut, 0):]
+        if not chunk:
+            break
+    if current is not None:
+        yield finish(current)
+
+
+PARSERS: Dict[str, Callable[[BinaryIO], Iterator[Dict[str, Any]]]] = {
+    "csv": parse_csv,
+    "ofx": parse_ofx,
+    "qfx": parse_ofx,
+}
+
+
+def _required_number(raw: Dict[str, Any], field: str, kind=Decimal):
+    """Parse a required, non-zero number the way DataRequired treats form fields."""
+    value = raw.get(field)
+    if value is None or str(value).strip() == "":
+        raise ValueError(f"{field} is required")
+    try:
+        number = kind(str(value).strip().replace(",", "").lstrip("$"))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"{field} is not a valid number: {value!r}")
+    if not number:
+        raise ValueError(f"{field} is required")
+    return number
+
+
+def validate_row(raw: Dict[str, Any], user_id, default_category: str,
+                 default_payment: str) -> Dict[str, Any]:
+    """
+    Validate a raw row against the `TransactionForm` rules and build the record to insert.
+
+    Fields the file provides must pass the form's rules. Fields the file format
+    does not carry at all get import defaults: one item, no taxes and the
+    chosen category and payment method.
+
+    Raises:
+        ValueError: If a field is missing or invalid
+    """
+    value = raw.get("transactionDate")
+    if not value:
+        raise ValueError("transactionDate is required")
+    try:
+        transaction_date = date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        try:
+            transaction_date = datetime.strptime(str(value).strip(), "%m/%d/%Y").date()
+        except ValueError:
+            raise ValueError(f"transactionDate is not a valid date: {value!r}")
+
+    subtotal = _required_number(raw, "transactionSubtotal")
+    total = _required_number(raw, "transactionTotal")
+    items = _required_number(raw, "transactionItems", kind=int) \
+        if "transactionItems" in raw else 1
+    taxes = _required_number(raw, "transactionTaxes") \
+        if "transactionTaxes" in raw else Decimal(0)
+
+    category = raw.get("transactionCategory", default_category)
+    if category not in CATEGORIES:
+        raise ValueError(f"transactionCategory is not a valid choice: {category!r}")
+    payment = raw.get("transactionPayment", default_payment)
+    if payment not in PAYMENTS:
+        raise ValueError(f"transactionPayment is not a valid choice: {payment!r}")
+
+    return {
+        "userId": user_id,
+        "transactionDate": transaction_date.isoformat(),
+        "transactionSubtotal": float(subtotal),
+        "transactionItems": items,
+        "transactionTaxes": float(taxes),
+        "transactionTotal": float(total),
+        "transactionCategory": category,
+        "transactionPayment": payment,
+    }
+
+
+def import_transactions(stream: BinaryIO, file_format: str, user_id, storage,
+                        default_category: str = "Other", default_payment: str = "Credit",
+                        batch_size: int = 500,
+                        progress: Optional[Callable[[ImportResult], None]] = None,
+                        on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> ImportResult:
+    """
+    Parse, validate and insert an uploaded file in bounded-size batches.
+
+    Args:
+        stream: The uploaded file
+        file_format: One of "csv", "ofx" or "qfx"
+        user_id: Id of the importing user
+        storage: Storage backend to write to
+        default_category: Category for rows that do not carry one
+        default_payment: Payment method for rows that do not carry one
+        batch_size: Maximum rows per insert
+        progress: Called with the running counts after every batch
+        on_batch: Called with each batch of rows once it is stored
+
+    Returns:
+        ImportResult: Final counts and the first few validation errors
+    """
+    parse = PARSERS[file_format]
+    result = ImportResult()
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        result.imported += storage.insert_transactions(batch)
+        if on_batch and batch:
+            on_batch(batch)
+        batch.clear()
+        if progress:
+            progress(result)
+
+    for line, raw in enumerate(parse(stream), start=1):
+        result.processed += 1
+        if raw.pop("skip", False):
+            result.skipped += 1
+            continue
+        try:
+            batch.append(validate_row(raw, user_id, default_category, default_payment))
+        except ValueError as exc:
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(f"Row {line}: {exc}")
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return result
@@ -0,0 +1,142 @@
+"""
+Background job queue for slow work that should not hold a request worker.
+Jobs are coalesced by key while in flight and their results are cached afterwards.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+
+class Job:
+    """A unit of background work, its partial progress and its outcome."""
+
+    def __init__(self, job_id: str, owner):
+        self.id = job_id
+        self.owner = owner
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.progress: List[Any] = []
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, ERROR)
+
+    def publish(self, item: Any) -> None:
+        """Record a partial result and wake up anyone following the job."""
+        with self._changed:
+            self.progress.append(item)
+            self._changed.notify_all()
+
+    def finish(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        """Set the final outcome of the job."""
+        with self._changed:
+            self.result = result
+            self.error = error
+            self.status = status
+            self._changed.notify_all()
+
+    def follow(self, timeout: float = 15.0) -> Iterator[Any]:
+        """
+        Yield every published item, then return once the job has finished.
+
+        Yields None whenever `timeout` seconds pass without progress, so callers
+        can keep an idle connection alive.
+        """
+        index = 0
+        while True:
+            with self._changed:
+                if index >= len(self.progress) and not self.finished:
+                    self._changed.wait(timeout)
+                items = self.progress[index:]
+                finished = self.finished
+            index += len(items)
+            if items:
+                yield from items
+            elif finished:
+                return
+            else:
+                yield None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable view of the job for status endpoints."""
+        return {"id": self.id, "status": self.status, "result": self.result, "error": self.error}
+
+
+class JobQueue:
+    """
+    Runs jobs on a bounded worker pool.
+
+    - The pool size caps how many jobs run at once across all users.
+    - Submitting a key that is already queued or running returns the existing job.
+    - Finished jobs stay cached until they expire or are evicted, failed ones are
+      retried the next time they are submitted.
+    """
+
+    def __init__(self, max_workers: int = 4, maxsize: int = 1024, ttl: int = 3600,
+                 name: str = "jobs"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_id(owner, key: str) -> str:
+        """Builds the public id for an (owner, key) pair."""
+        return hashlib.sha256(f"{owner}:{key}".encode()).hexdigest()[:32]
+
+    def submit(self, owner, key: str, function: Callable[..., Any], *args,
+               report_progress: bool = False, **kwargs) -> Job:
+        """
+        Queue `function(*args, **kwargs)` unless the same job is cached or in flight.
+
+        Args:
+            owner: Id of the user the job belongs to
+            key: Identifies the job's input, equal keys share one job
+            function: Callable to run on the pool
+            report_progress: Pass the job as the first argument so the function
+                             can publish partial results
+
+        Returns:
+            Job: The new, in-flight or cached job
+        """
+        job_id = self.job_id(owner, key)
+        with self._lock:
+            job = self._inflight.get(job_id) or self._jobs.get(job_id)
+            # Failed jobs stay visible to status checks but are retried on resubmit
+            if job is not None and job.status != ERROR:
+                return job
+            job = Job(job_id, owner)
+            self._inflight[job_id] = job
+        if report_progress:
+            args = (job,) + args
+        self._executor.submit(self._run, job, function, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._inflight.get(job_id) or self._jobs.get(job_id)
+
+    def _run(self, job: Job, function, args, kwargs) -> None:
+        job.status = RUNNING
+        try:
+            job.finish(DONE, result=function(*args, **kwargs))
+        except Exception as exc:
+            logger.exception("Job %s failed", job.id)
+            job.finish(ERROR, error=str(exc))
+        with self._lock:
+            self._inflight.pop(job.id, None)
+            self._jobs[job.id] = job
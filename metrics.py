@@ -0,0 +1,247 @@
+"""
+In-process request and dependency metrics, exposed in the Prometheus text format.
+
+- Counters and histograms are kept per process, so under a preforking server each
+  worker reports its own series and Prometheus should scrape every worker.
+- Inside a request, timed work is also summed per request and can be sent back
+  in a `Server-Timing` header.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from flask import g, has_request_context, request
+
+# Seconds, from a cache hit to a slow LLM call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts, sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_number(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """The set of metrics rendered by `/metrics`."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time until the view returned its response, by route.",
+    ("method", "route", "status"))
+STORAGE_SECONDS = registry.histogram(
+    "storage_call_duration_seconds", "Latency of storage backend calls.",
+    ("backend", "operation"))
+STORAGE_ERRORS = registry.counter(
+    "storage_call_errors_total", "Storage backend calls that raised.",
+    ("backend", "operation"))
+STORAGE_CALLS_PER_REQUEST = registry.histogram(
+    "storage_calls_per_request", "Storage backend calls made while serving one request, by route.",
+    ("route",), buckets=COUNT_BUCKETS)
+STAGE_SECONDS = registry.histogram(
+    "stage_duration_seconds", "Time spent in data processing stages.", ("stage",))
+LLM_SECONDS = registry.histogram(
+    "llm_invoke_duration_seconds", "Duration of LLM recommendation calls.", ("mode", "status"))
+LLM_TOKENS = registry.histogram(
+    "llm_tokens", "Tokens per LLM recommendation call, reported by the model or estimated.",
+    ("kind",), buckets=TOKEN_BUCKETS)
+LLM_TOKENS_TOTAL = registry.counter(
+    "llm_tokens_total", "Tokens sent to and received from the LLM.", ("kind",))
+
+
+_timing_lock = threading.Lock()
+
+
+def record_timing(name: str, seconds: float, calls: int = 1) -> None:
+    """Adds timed work to the current request's Server-Timing entries, if there is a request."""
+    if not has_request_context():
+        return
+    # Async views run a request's blocking calls on several threads at once
+    with _timing_lock:
+        timings = g.setdefault("server_timing", {})
+        total, count = timings.get(name, (0.0, 0))
+        timings[name] = (total + seconds, count + calls)
+
+
+@contextmanager
+def stage(name: str):
+    """Times a block as a processing stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        record_timing(name, elapsed)
+
+
+def timed(name: str):
+    """Decorator form of `stage`."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_call(mode: str, seconds: float, prompt_tokens: int, completion_tokens: int,
+                    failed: bool = False) -> None:
+    """Records one LLM call's duration and token usage."""
+    LLM_SECONDS.observe(seconds, mode=mode, status="error" if failed else "ok")
+    for kind, tokens in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+        LLM_TOKENS.observe(tokens, kind=kind)
+        LLM_TOKENS_TOTAL.inc(tokens, kind=kind)
+    record_timing("llm", seconds)
+
+
+def _route() -> str:
+    # The URL rule, not the path, keeps label cardinality bounded
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def _start_request() -> None:
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = _route()
+    REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=response.status_code)
+
+    timings = g.get("server_timing", {})
+    STORAGE_CALLS_PER_REQUEST.observe(timings.get("storage", (0.0, 0))[1], route=route)
+
+    if g.get("server_timing_enabled"):
+        entries = [f'{name};dur={total * 1000:.1f};desc="{count} call{"s" if count != 1 else ""}"'
+                   for name, (total, count) in timings.items()]
+        entries.append(f"total;dur={elapsed * 1000:.1f}")
+        response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+def init_app(app) -> None:
+    """
+    Records per-route latency for every request of `app`.
+
+    Set SERVER_TIMING (config or environment) to a true value to also return
+    each request's storage, stage and LLM timings in a `Server-Timing` header.
+    """
+    enabled = app.config.get("SERVER_TIMING", os.getenv("SERVER_TIMING", ""))
+    enabled = str(enabled).lower() in ("1", "true", "yes", "on")
+
+    @app.before_request
+    def start_request():
+        _start_request()
+        g.server_timing_enabled = enabled
+
+    app.after_request(_finish_request)
@@ -1,15 +1,39 @@
 """
 Module for generating financial recommendations using LangChain and Google's Gemini model.
 Provides functions to create an LLM instance and invoke it with transaction data.
+
+The model provider is chosen with LLM_PROVIDER: "gemini" (default) or "fake", an offline
+stand-in that returns schema-valid recommendations for load tests and CI.
 """
+import json
+import logging
+import math
 import os
-from typing import Dict, Any, List
+import random
+import time
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Tuple
 
 from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult, LLMResult
 from langchain_core.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+import metrics
+from extract_data import WEEKDAY_ORDER, extract_data
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the estimated size of the transaction summary sent to the model
+DEFAULT_TOKEN_BUDGET = int(os.getenv("LLM_TOKEN_BUDGET", 2000))
+RECENT_ROWS = 20
+TOP_OUTLIERS = 10
 
 
 class FinancialRecommendations(BaseModel):
@@ -28,19 +52,20 @@ class FinancialRecommendations(BaseModel):
 
 # Template for financial advice generation
 FINANCIAL_ADVICE_TEMPLATE = '''
-Answer the user query based on the provided format instructions and transaction data,
+Answer the user query based on the provided format instructions and transaction summary,
 {format_instructions}
 {data}
 
-Pretend you are a financial advisor, and you have been given data with the following schema:
-- transactionId: a unique identifier for the transaction, you can ignore
-- userId: a unique identifier for the user who made the transaction, you can ignore
-- transactionDate: the date of the transaction  
-- transactionSubtotal: the subtotal of the transaction
-- transactionItems: the total amount of items
-- transactionTaxes: the total taxes
-- transactionCategory: the category of the purchase
-- transactionPayment: the method of payment
+Pretend you are a financial advisor, and you have been given a summary of a user's transactions with the following sections:
+- Overview: the number of transactions, the date range and overall totals
+- Spending by category: total spent, number of transactions and share of spending per category
+- Spending by month: total spent and number of transactions per calendar month
+- Payment mix: total spent, number of transactions and share of spending per payment method
+- Weekday profile: average spending and number of transactions per day of the week
+- Largest transactions: the biggest individual purchases
+- Recent transactions: the latest purchases as date, category, payment, items, subtotal, taxes, total
+Further sections, such as Budgets, Unusual transactions or Recurring charges, may follow with extra context
+about the user; take them into account too.
 
 Make ten points of recommendations based on the data, each point should be a recommendation based on the data
 and be around a paragraph long, be as detailed as possible and refer to legitimate data for each point.
@@ -49,14 +74,261 @@ When I refer to a paragraph I mean a block of seven sentences each containing a
 to have at least one paragraph for each point.
 '''
 
+# Built once, only the model changes between chains
+PARSER = JsonOutputParser(pydantic_object=FinancialRecommendations)
+PROMPT = PromptTemplate(
+    template=FINANCIAL_ADVICE_TEMPLATE,
+    input_variables=["data"],
+    partial_variables={"format_instructions": PARSER.get_format_instructions()},
+)
+_chain = None
+_chain_llm = None
+
 
-def create_llm() -> ChatGoogleGenerativeAI:
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a piece of text.
+
+    Uses the common four-characters-per-token approximation so counting does not
+    need a round trip to the model provider.
+    """
+    return math.ceil(len(text) / 4)
+
+
+class TokenUsage(BaseCallbackHandler):
+    """Collects the token usage the chat model reports, for providers that report it."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.prompt_tokens += usage.get("input_tokens", 0)
+                self.completion_tokens += usage.get("output_tokens", 0)
+
+
+def _record_llm_call(mode: str, started: float, usage: TokenUsage, summary: str,
+                     result: Optional[Dict[str, str]]) -> None:
+    """Records duration and token usage of one call, estimating tokens the model did not report."""
+    prompt_tokens = usage.prompt_tokens or estimate_tokens(PROMPT.format(data=summary))
+    completion_tokens = usage.completion_tokens or estimate_tokens(json.dumps(result or {}))
+    metrics.record_llm_call(mode, time.perf_counter() - started, prompt_tokens, completion_tokens,
+                            failed=result is None)
+
+
+def _money(value: float) -> str:
+    return f"{value:.2f}"
+
+
+def _summary_sections(df, recent: int, outliers: int, months: Optional[int]) -> List[str]:
+    """Render the summary sections for the given detail level."""
+    total = df['Total'].sum()
+
+    lines = [
+        "Overview:",
+        f"- transactions: {len(df)}",
+        f"- from {df['Datetime'].iloc[0]} to {df['Datetime'].iloc[-1]}",
+        f"- total spent: {_money(total)}, subtotal: {_money(df['Subtotal'].sum())}, "
+        f"taxes: {_money(df['Taxes'].sum())}, items: {int(df['Items'].sum())}",
+        f"- average transaction: {_money(df['Total'].mean())}, median: {_money(df['Total'].median())}",
+    ]
+
+    by_category = df.groupby('Category', observed=True)['Total'].agg(['sum', 'count'])
+    lines.append("Spending by category:")
+    for category, row in by_category.sort_values('sum', ascending=False).iterrows():
+        lines.append(f"- {category}: {_money(row['sum'])} over {int(row['count'])} "
+                     f"({row['sum'] / total:.0%})")
+
+    by_month = df.groupby(df['Date'].dt.to_period('M'))['Total'].agg(['sum', 'count'])
+    if months is not None:
+        by_month = by_month.tail(months)
+    lines.append("Spending by month:")
+    for month, row in by_month.iterrows():
+        lines.append(f"- {month}: {_money(row['sum'])} over {int(row['count'])}")
+
+    by_payment = df.groupby('Payment Method', observed=True)['Total'].agg(['sum', 'count'])
+    lines.append("Payment mix:")
+    for method, row in by_payment.iterrows():
+        lines.append(f"- {method}: {_money(row['sum'])} over {int(row['count'])} "
+                     f"({row['sum'] / total:.0%})")
+
+    by_weekday = df.groupby('Weekday', observed=True)['Total'].agg(['mean', 'count'])
+    lines.append("Weekday profile:")
+    for weekday in WEEKDAY_ORDER:
+        if weekday in by_weekday.index:
+            row = by_weekday.loc[weekday]
+            lines.append(f"- {weekday}: average {_money(row['mean'])} over {int(row['count'])}")
+
+    columns = ['Datetime', 'Category', 'Payment Method', 'Items', 'Subtotal', 'Taxes', 'Total']
+    if outliers:
+        lines.append("Largest transactions:")
+        for row in df.nlargest(outliers, 'Total')[columns].itertuples(index=False):
+            lines.append("- " + ", ".join(str(v) for v in row))
+    if recent:
+        lines.append("Recent transactions:")
+        for row in df.tail(recent)[columns].itertuples(index=False):
+            lines.append("- " + ", ".join(str(v) for v in row))
+
+    return lines
+
+
+def _context_sections(context: Optional[Dict[str, List[str]]]) -> List[str]:
+    """Render extra named sections, e.g. {"Budgets": [...]}, after the summary."""
+    lines = []
+    for title, entries in (context or {}).items():
+        if entries:
+            lines.append(f"{title}:")
+            lines.extend(f"- {entry}" for entry in entries)
+    return lines
+
+
+def compact_transactions(data: List[Dict[str, Any]],
+                         token_budget: int = DEFAULT_TOKEN_BUDGET,
+                         context: Optional[Dict[str, List[str]]] = None,
+                         df: Optional["pd.DataFrame"] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Compress a transaction history into a statistical summary for the prompt.
+
+    Detail is dropped in order (recent rows, outliers, then older months) until
+    the summary fits the token budget. Context sections are always kept and
+    count against the budget.
+
+    Args:
+        data: List of transaction records
+        token_budget: Maximum estimated tokens for the summary
+        context: Extra sections to append, as section title -> lines
+        df: The `extract_data` frame of `data`, if the caller already built it
+
+    Returns:
+        Tuple of the summary text and a dict with the raw and compact token
+        estimates and the compaction ratio
+    """
+    # What the raw list would have cost, extrapolated from a sample
+    sample = data[:100]
+    raw_tokens = estimate_tokens(str(sample)) * len(data) // len(sample) if sample else 0
+    extra = _context_sections(context)
+
+    if not data:
+        summary = "\n".join(["No transactions have been logged yet."] + extra)
+    else:
+        if df is None:
+            df = extract_data(data)
+        recent, outliers, months = RECENT_ROWS, TOP_OUTLIERS, None
+        while True:
+            summary = "\n".join(_summary_sections(df, recent, outliers, months) + extra)
+            if estimate_tokens(summary) <= token_budget:
+                break
+            if recent:
+                recent //= 2
+            elif outliers:
+                outliers //= 2
+            elif months is None or months > 1:
+                months = 12 if months is None else months // 2
+            else:
+                break
+
+    compact_tokens = estimate_tokens(summary)
+    stats = {
+        "transactions": len(data),
+        "raw_tokens": raw_tokens,
+        "compact_tokens": compact_tokens,
+        "compaction_ratio": raw_tokens / compact_tokens if compact_tokens else 0.0,
+    }
+    return summary, stats
+
+
+class FakeFinancialLLM(BaseChatModel):
+    """
+    Offline chat model that answers with schema-valid `FinancialRecommendations` JSON.
+
+    Used to exercise the prompt, parser and request path without a provider:
+    each call takes `latency` seconds plus up to `jitter` seconds, and fails
+    with probability `failure_rate`. Streaming spreads the delay over `chunks`.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    chunks: int = 20
+    seed: Optional[int] = None
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-financial"
+
+    def _delay(self) -> float:
+        """Draw the simulated latency of one call, or raise an injected failure."""
+        if self._rng.random() < self.failure_rate:
+            raise RuntimeError("Injected fake LLM failure")
+        return self.latency + self._rng.uniform(0, self.jitter)
+
+    @staticmethod
+    def _answer(messages: List[BaseMessage]) -> str:
+        """Build schema-valid recommendations that mention the prompt size."""
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        points = {
+            name: f"Recommendation {i} based on a {prompt_chars} character summary."
+            for i, name in enumerate(FinancialRecommendations.model_fields, start=1)
+        }
+        return json.dumps(FinancialRecommendations(**points).model_dump())
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None,
+                  **kwargs: Any) -> ChatResult:
+        time.sleep(self._delay())
+        message = AIMessage(content=self._answer(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        # The latency is spread over the chunks, like tokens arriving from a provider
+        delay = self._delay()
+        text = self._answer(messages)
+        size = max(1, math.ceil(len(text) / self.chunks))
+        pieces = range(0, len(text), size)
+        for start in pieces:
+            time.sleep(delay / len(pieces))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text[start:start + size]))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def create_fake_llm() -> FakeFinancialLLM:
+    """
+    Create the offline stand-in model, configured from the environment.
+
+    Returns:
+        FakeFinancialLLM: Model with FAKE_LLM_LATENCY, FAKE_LLM_JITTER,
+        FAKE_LLM_FAILURE_RATE and FAKE_LLM_SEED applied
+    """
+    seed = os.getenv("FAKE_LLM_SEED")
+    return FakeFinancialLLM(
+        latency=float(os.getenv("FAKE_LLM_LATENCY", 0.0)),
+        jitter=float(os.getenv("FAKE_LLM_JITTER", 0.0)),
+        failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", 0.0)),
+        seed=int(seed) if seed is not None else None,
+    )
+
+
+def create_gemini_llm() -> BaseChatModel:
     """
     Create and configure a Google Gemini LLM instance.
+
+    The Gemini client is imported here so the fake provider never loads it.
     
     Returns:
         ChatGoogleGenerativeAI: Configured LLM instance
     """
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     load_dotenv()
     api_key = os.getenv("GOOGLE_API_KEY")
     
@@ -71,25 +343,113 @@ def create_llm() -> ChatGoogleGenerativeAI:
     )
 
 
-def invoke_llm(data: List[Dict[str, Any]], llm: ChatGoogleGenerativeAI) -> Dict[str, str]:
+LLM_PROVIDERS = {
+    "gemini": create_gemini_llm,
+    "fake": create_fake_llm,
+}
+
+
+def create_llm(provider: Optional[str] = None) -> BaseChatModel:
+    """
+    Create the LLM for the configured provider.
+
+    Args:
+        provider: Provider name, defaults to the LLM_PROVIDER environment variable
+
+    Returns:
+        BaseChatModel: Configured LLM instance
+    """
+    load_dotenv()
+    provider = (provider or os.getenv("LLM_PROVIDER", "gemini")).lower()
+    if provider not in LLM_PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER: {provider}")
+    return LLM_PROVIDERS[provider]()
+
+
+def build_chain(llm: BaseChatModel):
+    """
+    Return the prompt | llm | parser chain, rebuilt only when the model changes.
+    """
+    global _chain, _chain_llm
+    if _chain is None or _chain_llm is not llm:
+        _chain = PROMPT | llm | PARSER
+        _chain_llm = llm
+    return _chain
+
+
+def invoke_llm(data: List[Dict[str, Any]], llm: BaseChatModel,
+               token_budget: int = DEFAULT_TOKEN_BUDGET,
+               context: Optional[Dict[str, List[str]]] = None,
+               df: Optional["pd.DataFrame"] = None) -> Dict[str, str]:
     """
     Generate financial recommendations based on transaction data.
     
     Args:
         data: List of transaction records
         llm: LLM instance to use for generation
+        token_budget: Maximum estimated tokens for the transaction summary
+        context: Extra prompt sections, as section title -> lines
+        df: The `extract_data` frame of `data`, if the caller already built it
         
     Returns:
         Dict containing ten financial recommendations
     """
-    parser = JsonOutputParser(pydantic_object=FinancialRecommendations)
-    
-    prompt = PromptTemplate(
-        template=FINANCIAL_ADVICE_TEMPLATE,
-        input_variables=["data"],
-        partial_variables={"format_instructions": parser.get_format_instructions()},
-    )
-    
-    chain = prompt | llm | parser
-    response = chain.invoke({"data": data})
-    return response
\ No newline at end of file
+    summary, stats = compact_transactions(data, token_budget, context, df)
+    logger.info("LLM prompt compaction: %(transactions)d transactions, %(raw_tokens)d -> "
+                "%(compact_tokens)d tokens (%(compaction_ratio).1fx)", stats)
+
+    usage = TokenUsage()
+    started = time.perf_counter()
+    response = None
+    try:
+        response = build_chain(llm).invoke({"data": summary}, config={"callbacks": [usage]})
+        return response
+    finally:
+        _record_llm_call("invoke", started, usage, summary, response)
+
+
+def stream_llm(data: List[Dict[str, Any]], llm: BaseChatModel,
+               token_budget: int = DEFAULT_TOKEN_BUDGET,
+               context: Optional[Dict[str, List[str]]] = None,
+               df: Optional["pd.DataFrame"] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Stream financial recommendations one point at a time.
+
+    The parser re-parses the partial JSON after every chunk, a point is complete
+    as soon as the model has moved on to the next key.
+
+    Args:
+        data: List of transaction records
+        llm: LLM instance to use for generation
+        token_budget: Maximum estimated tokens for the transaction summary
+        context: Extra prompt sections, as section title -> lines
+        df: The `extract_data` frame of `data`, if the caller already built it
+
+    Yields:
+        Tuples of (point key, recommendation text) in generation order
+    """
+    summary, stats = compact_transactions(data, token_budget, context, df)
+    logger.info("LLM prompt compaction: %(transactions)d transactions, %(raw_tokens)d -> "
+                "%(compact_tokens)d tokens (%(compaction_ratio).1fx)", stats)
+
+    usage = TokenUsage()
+    started = time.perf_counter()
+    emitted = set()
+    latest: Dict[str, str] = {}
+    completed = False
+    try:
+        for partial in build_chain(llm).stream({"data": summary}, config={"callbacks": [usage]}):
+            if not isinstance(partial, dict):
+                continue
+            latest = partial
+            for key in list(partial)[:-1]:
+                if key not in emitted:
+                    emitted.add(key)
+                    yield key, partial[key]
+        completed = True
+    finally:
+        _record_llm_call("stream", started, usage, summary, latest if completed else None)
+
+    for key, value in latest.items():
+        if key not in emitted:
+            yield key, value
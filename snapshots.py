@@ -0,0 +1,61 @@
+"""
+Precomputed dashboard snapshots.
+A snapshot holds what `/home` and `/api/graphs` render for one user at one data version,
+built off the request path after each write so a page view is a cache lookup.
+"""
+import threading
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+
+class Snapshot:
+    """The rendered dashboard of one user at one data version."""
+
+    def __init__(self, version: int, total_transactions: int, first_page: Dict[str, Any],
+                 graphs: str):
+        self.version = version
+        self.total_transactions = total_transactions
+        # First page of the transaction table, shaped like an /api/transactions response
+        self.first_page = first_page
+        # The /api/graphs response body
+        self.graphs = graphs
+
+
+class SnapshotStore:
+    """
+    Latest dashboard snapshot per user, with LRU/TTL eviction.
+
+    Only one snapshot is kept per user: storing a newer version replaces the
+    older one, and a lookup that finds an older version than asked for evicts it.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 900):
+        self._snapshots = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version: int) -> Optional[Snapshot]:
+        """Return the user's snapshot if it was built at `version`."""
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is None or snapshot.version == version:
+                return snapshot
+            if snapshot.version < version:
+                del self._snapshots[user_id]
+            return None
+
+    def put(self, user_id, snapshot: Snapshot) -> bool:
+        """
+        Store a snapshot unless a newer one is already stored.
+
+        Builds can finish out of order when writes come in quick succession.
+
+        Returns:
+            bool: Whether the snapshot was stored
+        """
+        with self._lock:
+            current = self._snapshots.get(user_id)
+            if current is not None and current.version > snapshot.version:
+                return False
+            self._snapshots[user_id] = snapshot
+            return True
@@ -0,0 +1,138 @@
+// Virtualized transaction table: only the rows in view are in the DOM.
+// The first page comes embedded in the page, further pages are fetched
+// from /api/transactions while scrolling.
+(function () {
+    const wrapper = document.getElementById('transaction-table');
+    if (!wrapper) {
+        return;
+    }
+
+    const body = wrapper.querySelector('tbody');
+    const total = Number(wrapper.dataset.total);
+    const rowHeight = 33;
+    const overscan = 10;
+    // Failed page loads are retried after 1s, 2s, 4s... and given up after maxRetries
+    const retryDelay = 1000;
+    const maxRetries = 5;
+
+    const rows = [];
+    let cursor = null;
+    let done = false;
+    let loading = false;
+    let scheduled = false;
+    let failures = 0;
+
+    function addPage(page) {
+        rows.push(...page.transactions);
+        cursor = page.next_cursor;
+        done = !cursor;
+    }
+
+    function fetchPage() {
+        if (loading || done) {
+            return;
+        }
+        loading = true;
+
+        const url = new URL(wrapper.dataset.src, window.location.origin);
+        if (cursor) {
+            url.searchParams.set('cursor', cursor);
+        }
+
+        fetch(url, { credentials: 'same-origin' })
+            .then(response => {
+                // An expired session is redirected to the login page
+                if (response.redirected || (response.status >= 400 && response.status < 500)) {
+                    done = true;
+                }
+                if (!response.ok || response.redirected) {
+                    throw new Error('Loading transactions failed: ' + response.status);
+                }
+                return response.json();
+            })
+            .then(page => {
+                failures = 0;
+                addPage(page);
+                loading = false;
+                render();
+            })
+            .catch(error => {
+                console.error(error);
+                failures += 1;
+                if (failures > maxRetries) {
+                    done = true;
+                }
+                // Keep `loading` set until the retry so scrolling does not fetch sooner
+                window.setTimeout(() => {
+                    loading = false;
+                    render();
+                }, done ? 0 : retryDelay * 2 ** (failures - 1));
+            });
+    }
+
+    function spacer(height) {
+        const tr = document.createElement('tr');
+        tr.className = 'spacer';
+        tr.style.height = height + 'px';
+        return tr;
+    }
+
+    function cell(text) {
+        const td = document.createElement('td');
+        td.textContent = text;
+        return td;
+    }
+
+    function money(value) {
+        return Number(value).toFixed(2);
+    }
+
+    function renderRow(t) {
+        const tr = document.createElement('tr');
+        tr.append(
+            cell(String(t.transactionDate).slice(0, 10)),
+            cell(t.transactionItems),
+            cell(money(t.transactionSubtotal)),
+            cell(money(t.transactionTaxes)),
+            cell(money(t.transactionTotal)),
+            cell(t.transactionCategory),
+            cell(t.transactionPayment),
+        );
+        return tr;
+    }
+
+    function render() {
+        scheduled = false;
+        const first = Math.max(0, Math.floor(wrapper.scrollTop / rowHeight) - overscan);
+        const visible = Math.ceil(wrapper.clientHeight / rowHeight) + 2 * overscan;
+        const last = Math.min(rows.length, first + visible);
+        const known = done ? rows.length : Math.max(total, rows.length);
+
+        const fragment = document.createDocumentFragment();
+        fragment.append(spacer(Math.min(first, last) * rowHeight));
+        for (let i = first; i < last; i++) {
+            fragment.append(renderRow(rows[i]));
+        }
+        fragment.append(spacer(Math.max(0, known - last) * rowHeight));
+        body.replaceChildren(fragment);
+
+        if (first + visible + overscan >= rows.length) {
+            fetchPage();
+        }
+    }
+
+    wrapper.addEventListener('scroll', () => {
+        if (!scheduled) {
+            scheduled = true;
+            window.requestAnimationFrame(render);
+        }
+    });
+
+    const firstPage = wrapper.querySelector('script.first-page');
+    if (firstPage) {
+        addPage(JSON.parse(firstPage.textContent));
+        render();
+    } else {
+        fetchPage();
+    }
+})();
@@ -0,0 +1,34 @@
+"""
+Storage backends for users and transactions.
+
+The backend is picked with the STORAGE_BACKEND environment variable:
+- supabase (default): the hosted Supabase project from SUPABASE_URL/SUPABASE_KEY
+- sqlite: a local database file at SQLITE_PATH, for offline runs and benchmarks
+"""
+import os
+
+from storage.base import BUDGET_COLUMNS, TRANSACTION_COLUMNS, Cursor, Storage
+
+
+def create_storage(backend: str = None) -> Storage:
+    """
+    Create the configured storage backend.
+
+    Args:
+        backend: Backend name, defaults to the STORAGE_BACKEND environment variable
+
+    Returns:
+        Storage: The storage backend
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND", "supabase")).lower()
+    if backend == "supabase":
+        from storage.supabase_backend import SupabaseStorage
+        return SupabaseStorage(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    if backend == "sqlite":
+        from storage.sqlite_backend import SQLiteStorage
+        return SQLiteStorage(os.getenv("SQLITE_PATH", "transactionai.db"),
+                             pool_size=int(os.getenv("SQLITE_POOL_SIZE", 8)))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+__all__ = ["BUDGET_COLUMNS", "TRANSACTION_COLUMNS", "Cursor", "Storage", "create_storage"]
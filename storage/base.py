@@ -0,0 +1,111 @@
+"""
+Interface shared by every storage backend.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Keyset cursor: (transactionDate, transactionId) of the last row of the previous page
+Cursor = Tuple[str, int]
+
+TRANSACTION_COLUMNS = (
+    "transactionId", "userId", "transactionDate", "transactionSubtotal", "transactionItems",
+    "transactionTaxes", "transactionTotal", "transactionCategory", "transactionPayment",
+)
+
+BUDGET_COLUMNS = (
+    "budgetId", "userId", "budgetCategory", "budgetMonth", "budgetAmount", "budgetThreshold",
+)
+
+
+class Storage(ABC):
+    """
+    Users and transactions, as used by the web app.
+
+    Transactions are plain dicts keyed by the Supabase column names.
+    """
+
+    # ---- users ----
+
+    @abstractmethod
+    def find_user(self, username: str, password_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the userId and username of matching credentials, or None."""
+
+    @abstractmethod
+    def username_exists(self, username: str) -> bool:
+        """Check whether a username is already taken."""
+
+    @abstractmethod
+    def create_user(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a user and return the stored row."""
+
+    # ---- transactions ----
+
+    @abstractmethod
+    def count_transactions(self, user_id) -> int:
+        """Count a user's transactions."""
+
+    @abstractmethod
+    def fetch_transactions(self, user_id, columns: Sequence[str] = TRANSACTION_COLUMNS,
+                           start: Optional[str] = None,
+                           end: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return all of a user's transactions and their count.
+
+        Backends whose server caps the rows per request read the rows in pages.
+
+        Args:
+            user_id: Id of the user
+            columns: Columns to return
+            start: Earliest transactionDate to include (ISO date, inclusive)
+            end: Latest transactionDate to include (ISO date, inclusive)
+
+        Returns:
+            Tuple of (rows, count)
+        """
+
+    @abstractmethod
+    def insert_transaction(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a transaction and return the stored row, including its id."""
+
+    @abstractmethod
+    def insert_transactions(self, transactions: Sequence[Dict[str, Any]]) -> int:
+        """Insert a batch of transactions in one round trip and return how many were stored."""
+
+    @abstractmethod
+    def page_transactions(self, user_id, limit: int, after: Optional[Cursor] = None,
+                          columns: Sequence[str] = TRANSACTION_COLUMNS,
+                          start: Optional[str] = None,
+                          end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return one page of a user's transactions, newest first.
+
+        Args:
+            user_id: Id of the user
+            limit: Maximum number of rows
+            after: Keyset cursor of the last row of the previous page
+            columns: Columns to return
+            start: Earliest transactionDate to include (ISO date, inclusive)
+            end: Latest transactionDate to include (ISO date, inclusive)
+        """
+
+    # ---- budgets ----
+
+    @abstractmethod
+    def list_budgets(self, user_id) -> List[Dict[str, Any]]:
+        """Return all of a user's budgets."""
+
+    @abstractmethod
+    def save_budget(self, budget: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a budget, or replace the user's budget for the same category and month.
+
+        `budgetMonth` is "YYYY-MM", or None for a budget that applies to every month.
+        Returns the stored row, including its id.
+        """
+
+    @abstractmethod
+    def delete_budget(self, user_id, budget_id) -> bool:
+        """Delete one of the user's budgets, return whether it existed."""
+
+    def close(self) -> None:
+        """Release any held connections."""
@@ -0,0 +1,43 @@
+"""
+Storage wrapper that times every backend call for `/metrics` and Server-Timing.
+"""
+import time
+from functools import wraps
+
+import metrics
+from storage.base import Storage
+
+
+class InstrumentedStorage:
+    """
+    Delegates to a storage backend, recording the count and latency of each call.
+
+    Only public methods are timed. Calls a backend makes to itself are not
+    timed again, they count once, as the outer call.
+    """
+
+    def __init__(self, backend: Storage):
+        self.backend = backend
+        self.backend_name = type(backend).__name__
+
+    def __getattr__(self, name):
+        attribute = getattr(self.backend, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def timed_call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            except Exception:
+                metrics.STORAGE_ERRORS.inc(backend=self.backend_name, operation=name)
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                metrics.STORAGE_SECONDS.observe(elapsed, backend=self.backend_name, operation=name)
+                metrics.record_timing("storage", elapsed)
+
+        # Cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, timed_call)
+        return timed_call
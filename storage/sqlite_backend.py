@@ -0,0 +1,194 @@
+"""
+Local SQLite storage backend.
+Runs in WAL mode with indexes matching the app's access paths, for offline runs and benchmarks.
+"""
+import queue
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from storage.base import BUDGET_COLUMNS, TRANSACTION_COLUMNS, Cursor, Storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    userId INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    username TEXT NOT NULL,
+    email TEXT,
+    password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    transactionId INTEGER PRIMARY KEY AUTOINCREMENT,
+    userId INTEGER NOT NULL REFERENCES users(userId),
+    transactionDate TEXT NOT NULL,
+    transactionSubtotal REAL NOT NULL,
+    transactionItems INTEGER NOT NULL,
+    transactionTaxes REAL NOT NULL,
+    transactionTotal REAL NOT NULL,
+    transactionCategory TEXT NOT NULL,
+    transactionPayment TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS budgets (
+    budgetId INTEGER PRIMARY KEY AUTOINCREMENT,
+    userId INTEGER NOT NULL REFERENCES users(userId),
+    budgetCategory TEXT NOT NULL,
+    budgetMonth TEXT,
+    budgetAmount REAL NOT NULL,
+    budgetThreshold INTEGER NOT NULL DEFAULT 80
+);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
+CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions(userId);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date
+    ON transactions(userId, transactionDate, transactionId);
+-- One budget per (user, category, month), a NULL month is the every-month budget
+CREATE UNIQUE INDEX IF NOT EXISTS idx_budgets_user_category_month
+    ON budgets(userId, budgetCategory, IFNULL(budgetMonth, ''));
+"""
+
+
+class SQLiteStorage(Storage):
+    """
+    SQLite backend with a fixed-size connection pool.
+
+    WAL mode lets readers run alongside the single writer, so the pool can
+    serve concurrent requests from several worker threads.
+    """
+
+    def __init__(self, path: str = "transactionai.db", pool_size: int = 8):
+        self.path = path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection, committing on success."""
+        conn = self._pool.get()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    @staticmethod
+    def _select(user_id, columns: Sequence[str], start: Optional[str],
+                end: Optional[str]) -> Tuple[str, List[Any]]:
+        """Build the projected, date-filtered SELECT for a user's transactions."""
+        selected = ", ".join(c for c in columns if c in TRANSACTION_COLUMNS)
+        sql = f"SELECT {selected} FROM transactions WHERE userId = ?"
+        params: List[Any] = [user_id]
+        if start is not None:
+            sql += " AND transactionDate >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND transactionDate <= ?"
+            params.append(end)
+        return sql, params
+
+    def find_user(self, username: str, password_hash: str) -> Optional[Dict[str, Any]]:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT userId, username FROM users WHERE username = ? AND password = ?",
+                (username, password_hash)).fetchone()
+        return dict(row) if row else None
+
+    def username_exists(self, username: str) -> bool:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM users WHERE username = ? LIMIT 1", (username,)).fetchone()
+        return row is not None
+
+    def create_user(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO users (name, username, email, password) VALUES (?, ?, ?, ?)",
+                (user.get("name"), user["username"], user.get("email"), user["password"]))
+        return {**user, "userId": cursor.lastrowid}
+
+    def count_transactions(self, user_id) -> int:
+        with self.connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM transactions WHERE userId = ?", (user_id,)).fetchone()[0]
+
+    def fetch_transactions(self, user_id, columns: Sequence[str] = TRANSACTION_COLUMNS,
+                           start: Optional[str] = None,
+                           end: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        sql, params = self._select(user_id, columns, start, end)
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows], len(rows)
+
+    def insert_transaction(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        columns = [c for c in TRANSACTION_COLUMNS if c in transaction]
+        with self.connection() as conn:
+            cursor = conn.execute(
+                f"INSERT INTO transactions ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                [transaction[c] for c in columns])
+        return {**transaction, "transactionId": cursor.lastrowid}
+
+    def insert_transactions(self, transactions: Sequence[Dict[str, Any]]) -> int:
+        if not transactions:
+            return 0
+        columns = [c for c in TRANSACTION_COLUMNS if c in transactions[0]]
+        with self.connection() as conn:
+            conn.executemany(
+                f"INSERT INTO transactions ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                ([t[c] for c in columns] for t in transactions))
+        return len(transactions)
+
+    def page_transactions(self, user_id, limit: int, after: Optional[Cursor] = None,
+                          columns: Sequence[str] = TRANSACTION_COLUMNS,
+                          start: Optional[str] = None,
+                          end: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql, params = self._select(user_id, columns, start, end)
+        if after is not None:
+            sql += " AND (transactionDate, transactionId) < (?, ?)"
+            params.extend(after)
+        sql += " ORDER BY transactionDate DESC, transactionId DESC LIMIT ?"
+        params.append(limit)
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_budgets(self, user_id) -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(BUDGET_COLUMNS)} FROM budgets WHERE userId = ? "
+                "ORDER BY budgetCategory, budgetMonth", (user_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_budget(self, budget: Dict[str, Any]) -> Dict[str, Any]:
+        key = (budget["userId"], budget["budgetCategory"], budget.get("budgetMonth"))
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO budgets (userId, budgetCategory, budgetMonth, budgetAmount, budgetThreshold) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (userId, budgetCategory, IFNULL(budgetMonth, '')) DO UPDATE SET "
+                "budgetAmount = excluded.budgetAmount, budgetThreshold = excluded.budgetThreshold",
+                key + (budget["budgetAmount"], budget.get("budgetThreshold", 80)))
+            row = conn.execute(
+                f"SELECT {', '.join(BUDGET_COLUMNS)} FROM budgets "
+                "WHERE userId = ? AND budgetCategory = ? AND budgetMonth IS ?", key).fetchone()
+        return dict(row)
+
+    def delete_budget(self, user_id, budget_id) -> bool:
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM budgets WHERE userId = ? AND budgetId = ?", (user_id, budget_id))
+        return cursor.rowcount > 0
@@ -0,0 +1,135 @@
+"""
+Storage backend on top of the Supabase client.
+The `users` and `transactions` tables predate this module; run BUDGETS_SCHEMA once in the
+Supabase SQL editor to add the `budgets` table.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from postgrest.types import ReturnMethod
+from supabase import Client, create_client
+
+from storage.base import BUDGET_COLUMNS, TRANSACTION_COLUMNS, Cursor, Storage
+
+BUDGETS_SCHEMA = """
+create table if not exists budgets (
+    "budgetId" bigint generated by default as identity primary key,
+    "userId" bigint not null references users ("userId") on delete cascade,
+    "budgetCategory" text not null,
+    "budgetMonth" text check ("budgetMonth" ~ '^[0-9]{4}-(0[1-9]|1[0-2])$'),
+    "budgetAmount" numeric(12, 2) not null check ("budgetAmount" > 0),
+    "budgetThreshold" integer not null default 80 check ("budgetThreshold" between 1 and 100)
+);
+-- One budget per (user, category, month), a NULL month is the every-month budget
+create unique index if not exists budgets_user_category_month
+    on budgets ("userId", "budgetCategory", coalesce("budgetMonth", ''));
+"""
+
+# PostgREST returns at most `max-rows` (1000 by default on Supabase) rows per request
+FETCH_PAGE_SIZE = 1000
+
+
+class SupabaseStorage(Storage):
+    """Reads and writes the `users`, `transactions` and `budgets` tables through Supabase."""
+
+    def __init__(self, url: str, key: str):
+        self.client: Client = create_client(url, key)
+
+    @staticmethod
+    def _date_range(query, start: Optional[str], end: Optional[str]):
+        if start is not None:
+            query = query.gte("transactionDate", start)
+        if end is not None:
+            query = query.lte("transactionDate", end)
+        return query
+
+    def find_user(self, username: str, password_hash: str) -> Optional[Dict[str, Any]]:
+        response = self.client.table("users").select("userId, username").eq(
+            "username", username).eq("password", password_hash).execute()
+        return response.data[0] if response.data else None
+
+    def username_exists(self, username: str) -> bool:
+        response = self.client.table("users").select(
+            "userId").eq("username", username).limit(1).execute()
+        return bool(response.data)
+
+    def create_user(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.client.table("users").insert(user).execute()
+        return response.data[0]
+
+    def count_transactions(self, user_id) -> int:
+        response = self.client.table("transactions").select(
+            "transactionId", count="exact", head=True).eq("userId", user_id).execute()
+        return response.count
+
+    def fetch_transactions(self, user_id, columns: Sequence[str] = TRANSACTION_COLUMNS,
+                           start: Optional[str] = None,
+                           end: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        # Read in pages ordered by id, a row inserted meanwhile lands after the rows already read
+        rows: List[Dict[str, Any]] = []
+        count = None
+        while True:
+            query = self.client.table("transactions").select(
+                ", ".join(columns), count="exact" if count is None else None).eq("userId", user_id)
+            query = self._date_range(query, start, end)
+            response = query.order("transactionId").range(
+                len(rows), len(rows) + FETCH_PAGE_SIZE - 1).execute()
+            if count is None:
+                count = response.count
+            rows.extend(response.data)
+            if not response.data or len(rows) >= count:
+                return rows, count
+
+    def insert_transaction(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.client.table("transactions").insert(transaction).execute()
+        return response.data[0]
+
+    def insert_transactions(self, transactions: Sequence[Dict[str, Any]]) -> int:
+        if not transactions:
+            return 0
+        # Skip echoing the batch back, callers only need the count
+        self.client.table("transactions").insert(
+            list(transactions), returning=ReturnMethod.minimal).execute()
+        return len(transactions)
+
+    def page_transactions(self, user_id, limit: int, after: Optional[Cursor] = None,
+                          columns: Sequence[str] = TRANSACTION_COLUMNS,
+                          start: Optional[str] = None,
+                          end: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = self.client.table("transactions").select(
+            ", ".join(columns)).eq("userId", user_id)
+        query = self._date_range(query, start, end)
+        if after is not None:
+            date, transaction_id = after
+            query = query.or_(f"transactionDate.lt.{date},"
+                              f"and(transactionDate.eq.{date},transactionId.lt.{transaction_id})")
+        response = query.order("transactionDate", desc=True).order(
+            "transactionId", desc=True).limit(limit).execute()
+        return response.data
+
+    def list_budgets(self, user_id) -> List[Dict[str, Any]]:
+        response = self.client.table("budgets").select(", ".join(BUDGET_COLUMNS)).eq(
+            "userId", user_id).order("budgetCategory").order("budgetMonth").execute()
+        return response.data
+
+    def save_budget(self, budget: Dict[str, Any]) -> Dict[str, Any]:
+        # on_conflict cannot target the expression index behind the unique rule, look the budget up first
+        query = self.client.table("budgets").select("budgetId").eq(
+            "userId", budget["userId"]).eq("budgetCategory", budget["budgetCategory"])
+        month = budget.get("budgetMonth")
+        query = query.eq("budgetMonth", month) if month else query.is_("budgetMonth", "null")
+        existing = query.limit(1).execute().data
+        values = {"budgetAmount": budget["budgetAmount"],
+                  "budgetThreshold": budget.get("budgetThreshold", 80)}
+        if existing:
+            response = self.client.table("budgets").update(values).eq(
+                "budgetId", existing[0]["budgetId"]).execute()
+        else:
+            response = self.client.table("budgets").insert({
+                "userId": budget["userId"], "budgetCategory": budget["budgetCategory"],
+                "budgetMonth": month, **values}).execute()
+        return response.data[0]
+
+    def delete_budget(self, user_id, budget_id) -> bool:
+        response = self.client.table("budgets").delete().eq("userId", user_id).eq(
+            "budgetId", budget_id).execute()
+        return bool(response.data)
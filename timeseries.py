@@ -0,0 +1,129 @@
+"""
+Time-series views of a user's spending.
+Every view is derived from the per-day, per-category rollups kept in `UserAggregates`,
+so its cost depends on the number of days covered, not on the number of transactions,
+and a new transaction only touches its own day's bucket.
+"""
+from typing import Any, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from aggregates import UserAggregates
+
+# Resampling frequency -> pandas period; weeks start on Sunday, like the weekday chart
+FREQUENCIES = {"D": "D", "W": "W-SAT", "M": "M"}
+ROLLING_WINDOWS = (7, 30)
+
+
+def daily_spending(aggregates: UserAggregates) -> pd.DataFrame:
+    """
+    Spending per day and category.
+
+    Returns:
+        pd.DataFrame: One column per category, one row per day on a contiguous
+                      DatetimeIndex from the first to the last transaction,
+                      days without spending are 0.
+    """
+    if not aggregates.daily_totals:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name='Date'), dtype='float64')
+
+    keys = list(aggregates.daily_totals)
+    index = pd.MultiIndex.from_arrays(
+        [pd.to_datetime([day for day, _ in keys], format='ISO8601'),
+         [category for _, category in keys]],
+        names=['Date', 'Category'])
+    frame = pd.Series(list(aggregates.daily_totals.values()), index=index, dtype='float64') \
+        .unstack(fill_value=0.0)
+    days = pd.date_range(frame.index.min(), frame.index.max(), freq='D', name='Date')
+    frame = frame.reindex(days, fill_value=0.0).sort_index(axis=1)
+    frame.columns.name = None
+    return frame
+
+
+def resample_spending(aggregates: UserAggregates, freq: str = "M") -> pd.DataFrame:
+    """
+    Spending per day, week or month, per category and in total, across years.
+
+    Args:
+        aggregates: The user's rollups
+        freq: "D", "W" or "M"
+
+    Returns:
+        pd.DataFrame: Indexed by the start of each period, empty periods are 0.
+    """
+    daily = daily_spending(aggregates)
+    periods = daily.index.to_period(FREQUENCIES[freq]).start_time
+    resampled = daily.groupby(periods).sum()
+    resampled.index.name = 'Date'
+    resampled['Total'] = resampled.sum(axis=1)
+    return resampled
+
+
+def rolling_spending(aggregates: UserAggregates,
+                     windows: Sequence[int] = ROLLING_WINDOWS) -> pd.DataFrame:
+    """
+    Daily spending with trailing rolling sums.
+
+    Returns:
+        pd.DataFrame: A `Total` column and one `<n>-day` column per window.
+    """
+    total = daily_spending(aggregates).sum(axis=1)
+    rolling = pd.DataFrame({'Total': total})
+    for window in windows:
+        # The index is contiguous, so n rows are n days
+        rolling[f'{window}-day'] = total.rolling(window, min_periods=1).sum()
+    return rolling
+
+
+def cumulative_spending(aggregates: UserAggregates) -> pd.DataFrame:
+    """Running total of spending per category, day by day."""
+    return daily_spending(aggregates).cumsum()
+
+
+def month_over_month(aggregates: UserAggregates) -> pd.DataFrame:
+    """
+    Monthly spending with the change from the previous month.
+
+    Returns:
+        pd.DataFrame: `Total`, `Change` in dollars and `Change %`, which is
+                      empty when the previous month had no spending.
+    """
+    total = resample_spending(aggregates, "M")['Total']
+    previous = total.shift(1)
+    return pd.DataFrame({
+        'Total': total,
+        'Change': total - previous,
+        'Change %': ((total - previous) / previous.where(previous != 0)) * 100,
+    })
+
+
+def monthly_spending(aggregates: UserAggregates) -> pd.DataFrame:
+    """Total spending per calendar month, labelled "YYYY-MM", for the monthly chart."""
+    total = resample_spending(aggregates, "M")['Total']
+    return pd.DataFrame({'Month': total.index.strftime('%Y-%m'),
+                         'Year': total.index.year.astype(str),
+                         'Total': total.to_numpy()})
+
+
+VIEWS = {
+    "spending": resample_spending,
+    "rolling": rolling_spending,
+    "cumulative": cumulative_spending,
+    "mom": month_over_month,
+}
+# Row frequency of the views that ignore `freq`
+VIEW_FREQUENCIES = {"rolling": "D", "cumulative": "D", "mom": "M"}
+
+
+def to_json(frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Columnar JSON form of a series frame: ISO dates plus one list per column,
+    with missing values as null.
+    """
+    values = frame.astype('float64').round(2).replace([np.inf, -np.inf], np.nan)
+    return {
+        "index": frame.index.strftime('%Y-%m-%d').tolist(),
+        "series": {str(column): [None if np.isnan(v) else v for v in values[column].tolist()]
+                   for column in values.columns},
+    }
@@ -0,0 +1,148 @@
+"""
+Server-side cache of each user's transaction history.
+Keeps the transaction list out of the cookie session; the session only stores a version number
+and a marker of the user's last write.
+"""
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from cachetools import TTLCache
+
+
+class TransactionCache:
+    """
+    Per-user transaction cache with LRU/TTL eviction and a version counter.
+
+    Versions are kept outside the evictable entries so they only ever increase,
+    which makes (userId, version) safe to use as a key for derived data.
+
+    Entries are immutable tuples and a write stores a new one, so the rows
+    returned with a version never change after the read.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 900):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions: Dict[Any, int] = {}
+        # When each user's version was last bumped, for Last-Modified headers
+        self._modified: Dict[Any, float] = {}
+        # (userId, marker) of writes this process made or has reloaded past. A set rather
+        # than the last marker, so sessions of one user carrying different markers do not
+        # keep invalidating each other. Forgetting a marker after the TTL costs one reload.
+        self._markers = TTLCache(maxsize=maxsize * 16, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def _bump(self, user_id) -> int:
+        version = self._versions.get(user_id, 0) + 1
+        self._versions[user_id] = version
+        self._modified[user_id] = time.time()
+        return version
+
+    def version(self, user_id) -> int:
+        """Return the current data version for a user."""
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def modified(self, user_id) -> Optional[float]:
+        """Return when the user's data version last changed, as a Unix timestamp."""
+        with self._lock:
+            return self._modified.get(user_id)
+
+    def get(self, user_id) -> Optional[Tuple[int, Tuple[Dict[str, Any], ...], int]]:
+        """
+        Look up a user's cached transactions.
+
+        Args:
+            user_id: Id of the user
+
+        Returns:
+            Tuple of (version, transactions, total count), or None on a cache miss
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            return (self._versions.get(user_id, 0),) + entry
+
+    def set(self, user_id, transactions: Iterable[Dict[str, Any]], count: int,
+            expected: Optional[int] = None) -> Optional[int]:
+        """
+        Store a user's transaction list and bump their version.
+
+        Args:
+            user_id: Id of the user
+            transactions: The user's transactions, possibly only a recent window
+            count: How many transactions the user has in total
+            expected: The version read before loading `transactions`; if a write
+                      bumped it since, the list may miss that write and is not stored
+
+        Returns:
+            int: The new data version, or None if the list was not stored
+        """
+        with self._lock:
+            if expected is not None and self._versions.get(user_id, 0) != expected:
+                return None
+            version = self._bump(user_id)
+            self._entries[user_id] = (tuple(transactions), count)
+            return version
+
+    def append(self, user_id, transaction: Dict[str, Any]) -> int:
+        """
+        Append a newly inserted transaction and bump the user's version.
+
+        If the user is not cached the next read reloads from the database,
+        so only the version is bumped.
+
+        Returns:
+            int: The new data version
+        """
+        with self._lock:
+            version = self._bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                # A new tuple, readers holding the previous version keep their rows
+                self._entries[user_id] = (entry[0] + (transaction,), entry[1] + 1)
+            return version
+
+    def mark(self, user_id) -> str:
+        """
+        Record a write made by this process and return a new marker for it.
+
+        The marker goes in the user's session, so other processes can tell their
+        cached copy predates the write (see `sync`).
+        """
+        marker = uuid.uuid4().hex
+        with self._lock:
+            self._markers[(user_id, marker)] = True
+        return marker
+
+    def sync(self, user_id, marker: Optional[str]) -> bool:
+        """
+        Drop a user's cached transactions if `marker` is a write this process has not seen.
+
+        Markers are random, so "not seen" is the only order between them; once a
+        marker has been synced, sessions still carrying it are served from the cache.
+
+        Returns:
+            bool: Whether the cache was dropped and the version bumped
+        """
+        with self._lock:
+            if marker is None or (user_id, marker) in self._markers:
+                return False
+            self._markers[(user_id, marker)] = True
+            self._bump(user_id)
+            self._entries.pop(user_id, None)
+            return True
+
+    def invalidate(self, user_id) -> int:
+        """
+        Drop a user's cached transactions and bump their version.
+
+        Returns:
+            int: The new data version
+        """
+        with self._lock:
+            version = self._bump(user_id)
+            self._entries.pop(user_id, None)
+            return version